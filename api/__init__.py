@@ -1,8 +1,9 @@
-from flask import Blueprint, jsonify, Flask
+from flask import Blueprint, jsonify, Flask, Response
 
 from api.user import register_blueprint as register_user_api_blueprint
 from api.areas import register_blueprint as register_areas_api_blueprint
 from api.geocode import register_blueprint as register_geocode_api_blueprint
+from services.MetricsService import MetricsService
 
 api = Blueprint('api', __name__)
 
@@ -14,6 +15,11 @@ def about():
     })
 
 
+@api.route('/metrics')
+def metrics(metrics_service: MetricsService):
+    return Response(metrics_service.render(), mimetype='text/plain; version=0.0.4')
+
+
 def register_blueprint(app: Flask, url_prefix: str):
     app.register_blueprint(api, url_prefix=url_prefix)
     register_user_api_blueprint(app, '{}/user'.format(url_prefix))
@@ -1,16 +1,33 @@
 from flask import Blueprint, jsonify, request, Flask, Response, send_file
 
+from api.conditional import get_conditional_response, make_etag, get_query_etag_parts
 from api.helpers import retrieve_logged_in_user, retrieve_area, AreaRetrievalType, TokenLocation
 from api.pagination import get_paginated_items_from_qs
+from api.streaming import get_streamed_items_from_qs
+from config import AREA_NEAR_MAX_DISTANCE, AREA_BATCH_MAX_ITEMS
 from models.Area import area_categories_map
-from services.AreaService import AreaService
+from services.AreaService import AreaService, get_box_area_ratio
+from utils.errors import AreaImageDoesNotExist, AreaQueryLatitudeInvalid, AreaQueryLongitudeInvalid, \
+    AreaQueryMaxDistanceInvalid, AreaQueryBoundingBoxInvalid, AreaBatchOperationInvalid, AreaBatchItemsInvalid, \
+    AreaQueryCursorUnsupported
 
 api = Blueprint('api_areas', __name__)
 
+categories_etag = make_etag(sorted(area_categories_map.to_dict().items()))
+
+
+def get_areas_list_validators(area_service: AreaService, *etag_parts):
+    user = request.user
+
+    no_areas, last_updated_at = area_service.get_revision(user)
+    etag = make_etag(request.endpoint, user.id, no_areas, last_updated_at, get_query_etag_parts(), *etag_parts)
+
+    return etag, last_updated_at
+
 
 @api.route('/categories')
 def areas_get_categories():
-    return jsonify(area_categories_map.to_dict())
+    return get_conditional_response(categories_etag, lambda: jsonify(area_categories_map.to_dict()), public=True)
 
 
 @api.route('')
@@ -18,9 +35,13 @@ def areas_get_categories():
 def areas_get(area_service: AreaService):
     user = request.user
 
-    areas = area_service.find_by(owner=user).order_by('-id')
+    etag, last_modified = get_areas_list_validators(area_service)
+
+    def make_response():
+        areas = area_service.find_by(owner=user).order_by('-id')
+        return jsonify(get_paginated_items_from_qs(areas, owner=user))
 
-    return jsonify(get_paginated_items_from_qs(areas))
+    return get_conditional_response(etag, make_response, last_modified)
 
 
 @api.route('/all')
@@ -28,10 +49,80 @@ def areas_get(area_service: AreaService):
 def areas_get_all(area_service: AreaService):
     user = request.user
 
-    areas = area_service.find_by(owner=user).order_by('-id')
-    response = [a.to_dict() for a in areas]
+    etag, last_modified = get_areas_list_validators(area_service, request.headers.get('Accept'))
+
+    def make_response():
+        areas = area_service.find_by(owner=user).order_by('-id')
+        return get_streamed_items_from_qs(areas, owner=user)
+
+    response = get_conditional_response(etag, make_response, last_modified)
+    response.vary.add('Accept')
+
+    return response
+
+
+def parse_float(value: str, error_class, minimum: float, maximum: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise error_class('Must be a number')
+
+    if not minimum <= value <= maximum:
+        raise error_class('Must be between {} and {}'.format(minimum, maximum))
+
+    return value
+
+
+@api.route('/near')
+@retrieve_logged_in_user()
+def areas_get_near(area_service: AreaService):
+    user = request.user
+    latitude = parse_float(request.args.get('lat'), AreaQueryLatitudeInvalid, -90, 90)
+    longitude = parse_float(request.args.get('lon'), AreaQueryLongitudeInvalid, -180, 180)
+    max_distance = parse_float(request.args.get('max_distance', AREA_NEAR_MAX_DISTANCE), AreaQueryMaxDistanceInvalid,
+                               0, AREA_NEAR_MAX_DISTANCE)
+
+    #
+    # Cursor pagination orders and filters by id, which would replace the
+    # distance ordering of $near
+    #
+    if 'cursor' in request.args:
+        raise AreaQueryCursorUnsupported()
+
+    areas = area_service.find_near(user, longitude, latitude, max_distance)
+    count_areas = area_service.find_near_for_count(user, longitude, latitude, max_distance)
+
+    return jsonify(get_paginated_items_from_qs(areas, count_qs=count_areas, owner=user))
+
+
+@api.route('/within')
+@retrieve_logged_in_user()
+def areas_get_within(area_service: AreaService):
+    user = request.user
+    bbox = request.args.get('bbox', '').split(',')
+
+    if len(bbox) != 4:
+        raise AreaQueryBoundingBoxInvalid()
+
+    min_longitude = parse_float(bbox[0], AreaQueryBoundingBoxInvalid, -180, 180)
+    min_latitude = parse_float(bbox[1], AreaQueryBoundingBoxInvalid, -90, 90)
+    max_longitude = parse_float(bbox[2], AreaQueryBoundingBoxInvalid, -180, 180)
+    max_latitude = parse_float(bbox[3], AreaQueryBoundingBoxInvalid, -90, 90)
+
+    if min_longitude >= max_longitude or min_latitude >= max_latitude:
+        raise AreaQueryBoundingBoxInvalid()
+
+    #
+    # MongoDB matches the smaller of the two regions a polygon splits the
+    # sphere into, a box covering more than a hemisphere would match outside
+    #
+    if get_box_area_ratio(min_longitude, min_latitude, max_longitude, max_latitude) >= 0.5:
+        raise AreaQueryBoundingBoxInvalid('Must cover less than half of the globe')
 
-    return jsonify(response)
+    areas = area_service.find_within_box(user, min_longitude, min_latitude, max_longitude, max_latitude)
+    areas = areas.order_by('-id')
+
+    return jsonify(get_paginated_items_from_qs(areas, owner=user))
 
 
 @api.route('', methods=['POST'])
@@ -49,12 +140,67 @@ def areas_post(area_service: AreaService):
     return jsonify(area.to_dict())
 
 
+@api.route('/batch', methods=['POST'])
+@retrieve_logged_in_user()
+def areas_post_batch(area_service: AreaService):
+    user = request.user
+    operation = request.json.get('operation')
+    items = request.json.get('items')
+
+    if not isinstance(items, list) or not items:
+        raise AreaBatchItemsInvalid()
+
+    if len(items) > AREA_BATCH_MAX_ITEMS:
+        raise AreaBatchItemsInvalid('Must contain at most {} items'.format(AREA_BATCH_MAX_ITEMS))
+
+    if operation == 'delete':
+        area_service.delete_many(user, items)
+        return Response()
+
+    if not all(isinstance(item, dict) for item in items):
+        raise AreaBatchItemsInvalid()
+
+    if operation == 'add':
+        areas = area_service.add_many(user, items)
+    elif operation == 'update':
+        areas = area_service.update_many(user, items)
+    else:
+        raise AreaBatchOperationInvalid()
+
+    return jsonify({
+        'items': [area.to_dict(owner=user) for area in areas],
+    })
+
+
 @api.route('/<string:area_id>')
 @retrieve_logged_in_user()
 @retrieve_area(AreaRetrievalType.ID_AND_OWNER)
 def areas_get_area():
     area = request.area
-    return jsonify(area.to_dict())
+
+    etag = make_etag(area.id, area.version, area.updated_at)
+
+    return get_conditional_response(etag, lambda: jsonify(area.to_dict()), area.updated_at)
+
+
+@api.route('/<string:area_id>/image')
+@retrieve_logged_in_user(token_location=TokenLocation.QUERY_STRING)
+@retrieve_area(AreaRetrievalType.ID_AND_OWNER)
+def areas_get_area_image():
+    area = request.area
+
+    image = area.image.get()
+    if image is None:
+        raise AreaImageDoesNotExist()
+
+    response = send_file(image, mimetype=area.get_image_mimetype(image), conditional=False)
+    response.content_length = image.length
+    response.last_modified = image.upload_date
+    response.set_etag(str(image._id))
+    response.cache_control.public = False
+    response.cache_control.private = True
+
+    return response.make_conditional(request)
 
 
 @api.route('/<string:area_id>', methods=['PATCH'])
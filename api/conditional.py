@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from hashlib import sha1
+
+from flask import Response, request
+
+
+def make_etag(*parts) -> str:
+    data = '|'.join(str(part) for part in parts).encode('utf-8')
+    return sha1(data).hexdigest()
+
+
+def get_query_etag_parts():
+    return sorted(request.args.items(multi=True))
+
+
+def to_utc(value: datetime):
+    if value is None:
+        return None
+
+    #
+    # Dates are stored as naive local times, the same way updated_at_timestamp
+    # interprets them
+    #
+    return datetime.fromtimestamp(value.timestamp(), timezone.utc)
+
+
+def get_conditional_response(etag: str, make_response, last_modified: datetime = None, public: bool = False):
+    #
+    # Answer before the response is built so that a matching client costs
+    # only the lookups needed for the validators
+    #
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = make_response()
+
+    response.set_etag(etag)
+
+    if last_modified is not None:
+        response.last_modified = to_utc(last_modified)
+
+    response.cache_control.no_cache = True
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+
+    return response
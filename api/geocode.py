@@ -1,55 +1,123 @@
 from flask import Flask, Blueprint, request, jsonify
 
 from api.helpers import retrieve_logged_in_user
-from geopy.geocoders import Nominatim
-
-from config import GEOCODE_USER_AGENT
+from config import GEOCODE_BATCH_MAX_ITEMS
+from services.GeocodeService import GeocodeService, GeocodeLookupType
 from utils.errors import GeocodeLatitudeInvalid, GeocodeLongitudeInvalid, GeocodeAddressInvalid, GeocodeForwardFailed, \
-    GeocodeReverseFailed
+    GeocodeReverseFailed, GeocodeBatchInvalid, GeocodeLookupTypeInvalid, APIError
 
 api = Blueprint('api_geocode', __name__)
-geolocator = Nominatim(user_agent=GEOCODE_USER_AGENT)
+
+
+def parse_coordinate(value: str, error_class):
+    if not value:
+        raise error_class()
+
+    try:
+        return float(value)
+    except ValueError:
+        raise error_class('Must be a number')
 
 
 @api.route('forward')
 @retrieve_logged_in_user()
-def forward_get():
+def forward_get(geocode_service: GeocodeService):
     address = request.args.get('address')
 
     if not address:
         raise GeocodeAddressInvalid()
 
-    results = geolocator.geocode(address)
-    if not results:
+    result = geocode_service.forward(address)
+    if not result:
         raise GeocodeForwardFailed()
 
-    return jsonify({
-        'address': results.raw['display_name'],
-        'latitude': results.raw['lat'],
-        'longitude': results.raw['lon'],
-    })
+    return jsonify(result)
 
 
 @api.route('reverse')
 @retrieve_logged_in_user()
-def reverse_get():
-    latitude = request.args.get('latitude')
-    longitude = request.args.get('longitude')
+def reverse_get(geocode_service: GeocodeService):
+    latitude = parse_coordinate(request.args.get('latitude'), GeocodeLatitudeInvalid)
+    longitude = parse_coordinate(request.args.get('longitude'), GeocodeLongitudeInvalid)
 
-    if not latitude:
-        raise GeocodeLatitudeInvalid()
+    result = geocode_service.reverse(latitude, longitude)
+    if not result:
+        raise GeocodeReverseFailed()
 
-    if not longitude:
-        raise GeocodeLongitudeInvalid()
+    return jsonify(result)
 
-    results = geolocator.reverse((latitude, longitude))
-    if not results:
-        raise GeocodeReverseFailed()
+
+def parse_batch_item(item: dict):
+    if not isinstance(item, dict):
+        raise GeocodeLookupTypeInvalid()
+
+    try:
+        lookup_type = GeocodeLookupType(item.get('type'))
+    except ValueError:
+        raise GeocodeLookupTypeInvalid()
+
+    if lookup_type == GeocodeLookupType.FORWARD:
+        address = item.get('address')
+        if not address or not isinstance(address, str):
+            raise GeocodeAddressInvalid()
+
+        return lookup_type, address
+
+    latitude = parse_coordinate(str(item.get('latitude', '')), GeocodeLatitudeInvalid)
+    longitude = parse_coordinate(str(item.get('longitude', '')), GeocodeLongitudeInvalid)
+
+    return lookup_type, latitude, longitude
+
+
+@api.route('batch', methods=['POST'])
+@retrieve_logged_in_user()
+def batch_post(geocode_service: GeocodeService):
+    items = request.json.get('items')
+
+    if not isinstance(items, list) or len(items) > GEOCODE_BATCH_MAX_ITEMS:
+        raise GeocodeBatchInvalid('Must be a list of at most {} items'.format(GEOCODE_BATCH_MAX_ITEMS))
+
+    lookups = []
+    for item in items:
+        try:
+            lookups.append(parse_batch_item(item))
+        except APIError as e:
+            lookups.append(e)
+
+    results = iter(geocode_service.batch([lookup for lookup in lookups if not isinstance(lookup, APIError)]))
+
+    response = []
+    for lookup in lookups:
+        if isinstance(lookup, APIError):
+            error = lookup
+        else:
+            result = next(results)
+            if result is None and lookup[0] == GeocodeLookupType.FORWARD:
+                error = GeocodeForwardFailed()
+            elif result is None:
+                error = GeocodeReverseFailed()
+            elif isinstance(result, APIError):
+                error = result
+            else:
+                response.append({
+                    'result': result,
+                })
+                continue
+
+        response.append({
+            'error': error.to_dict(),
+        })
 
     return jsonify({
-        'address': results.raw['display_name'],
+        'items': response,
     })
 
 
+@api.route('stats')
+@retrieve_logged_in_user()
+def stats_get(geocode_service: GeocodeService):
+    return jsonify(geocode_service.get_stats())
+
+
 def register_blueprint(app: Flask, prefix: str):
     app.register_blueprint(api, url_prefix=prefix)
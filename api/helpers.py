@@ -4,12 +4,13 @@ from functools import wraps
 from typing import Union
 
 from flask import request, Response
-from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from flask_jwt_extended import create_access_token, create_refresh_token
 from flask_jwt_extended.utils import verify_token_type
 
 from config import ACCESS_TOKEN_HEADER_NAMES, REFRESH_TOKEN_HEADER_NAMES, ACCESS_TOKEN_QUERY_STRING_NAMES, \
     REFRESH_TOKEN_QUERY_STRING_NAMES
 from services.AreaService import AreaService
+from services.TokenService import TokenService
 from services.UserService import UserService
 from utils.dependencies import services_injector
 from utils.errors import UserNotLoggedIn, UserLoggedInInvalid, AreaDoesNotExist, JWTHeaderMissing
@@ -94,7 +95,7 @@ def _decode_token(request_type: TokenType, token_location: TokenLocation) -> Uni
     elif token_location == TokenLocation.QUERY_STRING:
         encoded_token = _get_encoded_token(request_type, _get_query_param_names, _get_query_param_token)
 
-    decoded_token = decode_token(encoded_token)
+    decoded_token = services_injector.get(TokenService).decode(encoded_token)
     verify_token_type(decoded_token, expected_type=request_type.value)
     return decoded_token
 
@@ -126,7 +127,7 @@ def _verify_access_token(optional: bool, token_location: TokenLocation) -> Union
     except Exception:
         pass
 
-    return _create_fresh_access_token(username)
+    return services_injector.get(TokenService).get_fresh_access_token(username)
 
 
 def retrieve_logged_in_user(optional: bool = False, token_location: TokenLocation = TokenLocation.HEADERS):
@@ -145,7 +146,7 @@ def retrieve_logged_in_user(optional: bool = False, token_location: TokenLocatio
                     raise UserNotLoggedIn()
 
             user_service = services_injector.get(UserService)
-            user = user_service.find_one_by(username=username)
+            user = user_service.find_one_by_username(username)
             if not user:
                 raise UserLoggedInInvalid()
 
@@ -188,6 +189,12 @@ def retrieve_area(retrieval_type: AreaRetrievalType):
             if area is None:
                 raise AreaDoesNotExist()
 
+            #
+            # The area was queried by owner, reuse the logged in user instead of
+            # dereferencing it again
+            #
+            area.owner = user
+
             request.area = area
 
             return fn(*args, **kwargs)
@@ -1,10 +1,16 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
 from math import ceil
 
+from bson import ObjectId
+from bson.errors import InvalidId
 from flask import request
 from mongoengine import QuerySet
 
 from config import MAX_PAGINATED_LIMIT
-from utils.errors import PaginationPageInvalid, PaginationLimitInvalid
+from utils.errors import PaginationPageInvalid, PaginationLimitInvalid, PaginationCursorInvalid
+
+CURSOR_NEXT = 'next'
+CURSOR_PREV = 'prev'
 
 
 def default_mapping_fn(item, *args, **kwargs):
@@ -18,27 +24,66 @@ def get_page_count(no_items, limit) -> int:
         return 0
 
 
-def get_paginated_items_from_qs(qs: QuerySet, mapping_fn=default_mapping_fn, *args, **kwargs):
-    page = request.args.get('page', default=0)
+def get_limit() -> int:
     limit = request.args.get('limit', default=MAX_PAGINATED_LIMIT)
 
     try:
-        page = int(page)
+        limit = int(limit)
     except ValueError:
-        raise PaginationPageInvalid()
+        raise PaginationLimitInvalid()
+
+    #
+    # A limit of 0 means no limit to MongoDB and a negative one is applied as
+    # a single batch of its absolute value
+    #
+    if limit < 1:
+        raise PaginationLimitInvalid()
+
+    return min(limit, MAX_PAGINATED_LIMIT)
+
+
+def encode_cursor(direction: str, item_id: ObjectId) -> str:
+    data = '{}:{}'.format(direction, item_id).encode('utf-8')
+    return urlsafe_b64encode(data).decode('utf-8')
 
+
+def decode_cursor(cursor: str):
     try:
-        limit = int(limit)
+        data = urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8')
+        direction, item_id = data.split(':')
+        item_id = ObjectId(item_id)
+    except (ValueError, InvalidId):
+        raise PaginationCursorInvalid()
+
+    if direction not in (CURSOR_NEXT, CURSOR_PREV):
+        raise PaginationCursorInvalid()
+
+    return direction, item_id
+
+
+def get_paginated_items_from_qs(qs: QuerySet, mapping_fn=default_mapping_fn, *args, count_qs: QuerySet = None,
+                                **kwargs):
+    if count_qs is None:
+        count_qs = qs
+
+    if 'cursor' in request.args:
+        return get_cursor_paginated_items_from_qs(qs, mapping_fn, *args, count_qs=count_qs, **kwargs)
+
+    page = request.args.get('page', default=0)
+
+    try:
+        page = int(page)
     except ValueError:
-        raise PaginationLimitInvalid()
+        raise PaginationPageInvalid()
 
-    limit = min(limit, MAX_PAGINATED_LIMIT)
+    limit = get_limit()
     skip = page * limit
 
     qs = qs.skip(skip).limit(limit)
+    items = list(qs)
 
-    no_total_items = qs.count()
-    no_items = qs.count(with_limit_and_skip=True)
+    no_total_items = count_qs.count()
+    no_items = len(items)
     no_items_before = max(skip, 0)
     no_items_after = max(no_total_items - skip - no_items, 0)
 
@@ -53,5 +98,64 @@ def get_paginated_items_from_qs(qs: QuerySet, mapping_fn=default_mapping_fn, *ar
         'no_pages': get_page_count(no_total_items, limit),
         'no_pages_before': get_page_count(no_items_before, limit),
         'no_pages_after': get_page_count(no_items_after, limit),
-        'items': [mapping_fn(item, *args, **kwargs) for item in qs],
+        'items': [mapping_fn(item, *args, **kwargs) for item in items],
     }
+
+
+def get_cursor_paginated_items_from_qs(qs: QuerySet, mapping_fn=default_mapping_fn, *args, count_qs: QuerySet = None,
+                                       **kwargs):
+    if count_qs is None:
+        count_qs = qs
+
+    cursor = request.args.get('cursor')
+    with_count = request.args.get('count') in ('1', 'true')
+    limit = get_limit()
+
+    #
+    # Items are always ordered by descending id, previous pages are fetched
+    # in ascending order starting from the cursor and reversed afterwards
+    #
+    if cursor:
+        direction, cursor_id = decode_cursor(cursor)
+    else:
+        direction, cursor_id = CURSOR_NEXT, None
+
+    if cursor_id is None:
+        page_qs = qs.order_by('-id')
+    elif direction == CURSOR_NEXT:
+        page_qs = qs.filter(id__lt=cursor_id).order_by('-id')
+    else:
+        page_qs = qs.filter(id__gt=cursor_id).order_by('id')
+
+    items = list(page_qs.limit(limit + 1))
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if direction == CURSOR_NEXT:
+        has_next = has_more
+        has_prev = cursor_id is not None
+    else:
+        items.reverse()
+        has_next = True
+        has_prev = has_more
+
+    next_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(CURSOR_NEXT, items[-1].id)
+
+    prev_cursor = None
+    if items and has_prev:
+        prev_cursor = encode_cursor(CURSOR_PREV, items[0].id)
+
+    d = {
+        'limit': limit,
+        'no_items': len(items),
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'items': [mapping_fn(item, *args, **kwargs) for item in items],
+    }
+
+    if with_count:
+        d['no_total_items'] = count_qs.count()
+
+    return d
@@ -0,0 +1,52 @@
+from flask import Response, json, request, stream_with_context
+from mongoengine import QuerySet
+
+from api.pagination import default_mapping_fn
+from config import STREAM_BATCH_SIZE
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def generate_encoded_chunks(qs: QuerySet, mapping_fn, *args, **kwargs):
+    chunk = []
+
+    for item in qs:
+        chunk.append(json.dumps(mapping_fn(item, *args, **kwargs)))
+
+        if len(chunk) == STREAM_BATCH_SIZE:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def generate_ndjson(qs: QuerySet, mapping_fn, *args, **kwargs):
+    for chunk in generate_encoded_chunks(qs, mapping_fn, *args, **kwargs):
+        yield '\n'.join(chunk) + '\n'
+
+
+def generate_json_array(qs: QuerySet, mapping_fn, *args, **kwargs):
+    separator = '['
+
+    for chunk in generate_encoded_chunks(qs, mapping_fn, *args, **kwargs):
+        yield separator + ','.join(chunk)
+        separator = ','
+
+    if separator == '[':
+        yield '[]\n'
+    else:
+        yield ']\n'
+
+
+def get_streamed_items_from_qs(qs: QuerySet, mapping_fn=default_mapping_fn, *args, **kwargs) -> Response:
+    qs = qs.batch_size(STREAM_BATCH_SIZE)
+
+    mimetype = request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE], default=JSON_MIMETYPE)
+    if mimetype == NDJSON_MIMETYPE:
+        generator = generate_ndjson(qs, mapping_fn, *args, **kwargs)
+    else:
+        generator = generate_json_array(qs, mapping_fn, *args, **kwargs)
+
+    return Response(stream_with_context(generator), mimetype=mimetype)
@@ -1,20 +1,43 @@
 #!/usr/bin/env python3
+import eventlet
 
+eventlet.monkey_patch()
+
+import atexit
 import traceback
+from time import perf_counter
 
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_injector import FlaskInjector
 from flask_socketio import SocketIO
 
 from api import register_blueprint as register_api_blueprint
-from config import JWT_SECRET_KEY, HOST, PORT, ACCESS_TOKEN_HEADER_NAMES, REFRESH_TOKEN_HEADER_NAMES, SECRET_KEY
+from config import JWT_SECRET_KEY, HOST, PORT, ACCESS_TOKEN_HEADER_NAMES, REFRESH_TOKEN_HEADER_NAMES, SECRET_KEY, \
+    COMPRESSION_ENCODINGS, COMPRESSION_LEVELS, COMPRESSION_MIN_SIZE, COMPRESSION_MIMETYPES
 from database import connect_database_from_config
+from services.AreaService import AreaService
+from services.MetricsService import MetricsService
+from services.NotificationService import NotificationService
+from utils.MessageBus import MessageBus
+from utils.MetricsRegistry import MetricsRegistry
+from utils.MongoCommandCounter import MongoCommandCounter
+from utils.compression import get_available_encodings, is_compressible, compress_response
 from utils.dependencies import services_injector
 from utils.errors import APIError, UserTokenExpired, UserTokenInvalid
 
-connect_database_from_config()
+metrics_registry = services_injector.get(MetricsRegistry)
+metrics_registry.register_histogram('http_request_duration_seconds', 'HTTP request duration until the response '
+                                                                     'headers are ready')
+metrics_registry.register_histogram('http_response_size_bytes', 'HTTP response body size',
+                                    buckets=(100, 1000, 10000, 100000, 1000000, 10000000))
+metrics_registry.register_histogram('http_request_mongo_commands', 'Mongo commands issued per HTTP request',
+                                    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100))
+
+slow_query_logger = connect_database_from_config(event_listeners=[MongoCommandCounter(metrics_registry)])
+if slow_query_logger is not None:
+    services_injector.get(MetricsService).add_stats_source('slow_queries', slow_query_logger.get_stats)
 
 app = Flask(__name__)
 
@@ -35,6 +58,66 @@ FlaskInjector(app=app, injector=services_injector)
 socket_server = services_injector.get(SocketIO)
 socket_server.init_app(app)
 
+message_bus = services_injector.get(MessageBus)
+message_bus.start()
+atexit.register(message_bus.close)
+
+notification_service = services_injector.get(NotificationService)
+atexit.register(notification_service.close)
+
+area_service = services_injector.get(AreaService)
+atexit.register(area_service.emitter.close)
+
+
+@app.before_request
+def before_request_metrics():
+    g.request_start = perf_counter()
+    g.mongo_commands = 0
+
+
+@app.after_request
+def after_request_metrics(response):
+    #
+    # Streamed bodies are produced after this hook, their size and the
+    # commands they issue are not accounted for
+    #
+    endpoint = request.endpoint or 'unknown'
+    metrics_registry.observe('http_request_duration_seconds', {
+        'endpoint': endpoint,
+        'method': request.method,
+        'status': response.status_code,
+    }, perf_counter() - g.request_start)
+    metrics_registry.observe('http_request_mongo_commands', {'endpoint': endpoint}, g.mongo_commands)
+
+    if response.content_length is not None:
+        metrics_registry.observe('http_response_size_bytes', {'endpoint': endpoint}, response.content_length)
+
+    return response
+
+
+compression_encodings = get_available_encodings(COMPRESSION_ENCODINGS)
+for encoding in COMPRESSION_ENCODINGS:
+    if encoding not in compression_encodings:
+        print('Compression encoding {} is not available, install its package to enable it'.format(encoding))
+
+
+#
+# Registered after the metrics hook so that it runs before it and the
+# recorded response sizes are the compressed ones
+#
+@app.after_request
+def after_request_compression(response):
+    if not is_compressible(response, COMPRESSION_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = request.accept_encodings.best_match(compression_encodings)
+    if encoding is None:
+        return response
+
+    return compress_response(response, encoding, COMPRESSION_LEVELS[encoding], COMPRESSION_MIN_SIZE)
+
 
 @app.errorhandler(APIError)
 def http_errorhandler(e):
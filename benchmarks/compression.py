@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from utils.compression import compressor_classes, make_compressor, compress, generate_compressed
+
+DEFAULT_LEVELS = {
+    'gzip': [1, 6, 9],
+    'br': [1, 4, 11],
+    'zstd': [1, 3, 19],
+}
+
+
+def make_area_dict(rng: random.Random, i: int, owner: dict) -> dict:
+    timestamp = int(datetime.now().timestamp()) - rng.randrange(86400 * 365)
+
+    return {
+        'id': '{:024x}'.format(rng.getrandbits(96)),
+        'owner': owner,
+        'name': '{} {}'.format(i, rng.choice(['My home', 'My office', 'Kitchen', 'Garage'])),
+        'category': rng.randrange(4),
+        'no_devices': 0,
+        'no_controllers': 0,
+        'location': rng.choice(['Aleea Putna, Nr. 4, Cluj-Napoca', 'Bulevardul 21 Decembrie 1989 77, Cluj-Napoca']),
+        'location_point': [rng.uniform(-180, 180), rng.uniform(-90, 90)],
+        'created_at_timestamp': timestamp,
+        'updated_at_timestamp': timestamp + rng.randrange(86400),
+        'image': {'id': '{:024x}'.format(rng.getrandbits(96)), 'size': rng.randrange(10000, 2000000)}
+        if rng.random() < 0.5 else None,
+        'version': rng.randrange(1, 100),
+    }
+
+
+def make_payloads(rng: random.Random, no_areas: int, chunk_size: int):
+    owner = {'username': 'benchmark', 'first_name': 'Benchmark', 'last_name': 'User'}
+    areas = [make_area_dict(rng, i, owner) for i in range(no_areas)]
+
+    page = json.dumps({'items': areas[:20], 'no_items': 20, 'no_total_items': no_areas}).encode('utf-8')
+    full = json.dumps(areas).encode('utf-8')
+    chunks = ['\n'.join(json.dumps(area) for area in areas[i:i + chunk_size]) + '\n'
+              for i in range(0, no_areas, chunk_size)]
+
+    return page, full, chunks
+
+
+def measure(fn, repetitions: int):
+    start = time.process_time()
+    for _ in range(repetitions):
+        result = fn()
+    return (time.process_time() - start) / repetitions, result
+
+
+def report(name: str, encoding: str, level: int, size: int, elapsed: float, compressed_size: int):
+    print('{:<8} {:<5} {:>5} {:>10} {:>10} {:>7.1%} {:>10.3f} {:>9.1f}'.format(
+        name, encoding, level, size, compressed_size, 1 - compressed_size / size, elapsed * 1000,
+        size / elapsed / 1024 / 1024 if elapsed else 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the CPU cost of compressing area responses against the '
+                                                 'bytes saved')
+    parser.add_argument('--areas', type=int, default=2000, help='areas in the full list and stream payloads')
+    parser.add_argument('--chunk-size', type=int, default=100, help='areas per streamed chunk')
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--encodings', nargs='+', default=list(compressor_classes))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    page, full, chunks = make_payloads(random.Random(args.seed), args.areas, args.chunk_size)
+    stream_size = sum(len(chunk.encode('utf-8')) for chunk in chunks)
+
+    print('{:<8} {:<5} {:>5} {:>10} {:>10} {:>7} {:>10} {:>9}'.format(
+        'payload', 'enc', 'level', 'bytes', 'encoded', 'saved', 'cpu ms', 'MB/s'))
+
+    for encoding in args.encodings:
+        if encoding not in compressor_classes:
+            print('{} is not available, skipping'.format(encoding))
+            continue
+
+        for level in DEFAULT_LEVELS[encoding]:
+            for name, payload in (('page', page), ('list', full)):
+                elapsed, compressed = measure(lambda: compress(encoding, level, payload), args.repetitions)
+                report(name, encoding, level, len(payload), elapsed, len(compressed))
+
+            elapsed, compressed = measure(
+                lambda: b''.join(generate_compressed(make_compressor(encoding, level), chunks)), args.repetitions)
+            report('stream', encoding, level, stream_size, elapsed, len(compressed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+import eventlet
+
+eventlet.monkey_patch()
+
+import argparse
+import base64
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from io import BytesIO
+
+from PIL import Image
+from pymongo import monitoring
+
+BENCHMARK_PREFIX = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark'
+
+counted_mongomock_methods = [
+    'find', 'find_one', 'find_one_and_update', 'find_one_and_replace', 'find_one_and_delete', 'insert_one',
+    'insert_many', 'update_one', 'update_many', 'replace_one', 'delete_one', 'delete_many', 'count_documents',
+    'estimated_document_count', 'aggregate', 'bulk_write', 'distinct',
+]
+
+regression_tolerances = {
+    'p50_ms': None,
+    'p99_ms': None,
+    'queries_per_request': 0,
+    'peak_alloc_kb': None,
+}
+
+
+class QueryCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+        self.__local = threading.local()
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def install_mongomock(self):
+        #
+        # mongomock does not publish command events, count the outermost
+        # collection calls instead
+        #
+        from mongomock.collection import Collection
+
+        def wrap(fn):
+            def wrapper(*args, **kwargs):
+                depth = getattr(self.__local, 'depth', 0)
+                if not depth:
+                    self.count += 1
+
+                self.__local.depth = depth + 1
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.__local.depth = depth
+
+            return wrapper
+
+        for name in counted_mongomock_methods:
+            setattr(Collection, name, wrap(getattr(Collection, name)))
+
+
+class StubLocation:
+    def __init__(self, raw: dict):
+        self.raw = raw
+
+
+class StubGeocoder:
+    def geocode(self, address):
+        return StubLocation({'display_name': address, 'lat': '46.77', 'lon': '23.59'})
+
+    def reverse(self, point):
+        return StubLocation({'display_name': 'Near {}'.format(point), 'lat': str(point[0]), 'lon': str(point[1])})
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(percentile / 100 * (len(values) - 1))))]
+
+
+def check(response):
+    if response.status_code != 200:
+        raise RuntimeError('{} {}'.format(response.status_code, response.get_data(as_text=True)[:200]))
+
+    return response
+
+
+def measure(fn, iterations: int, warmup: int, alloc_iterations: int, counter: QueryCounter):
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    queries_start = counter.count
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    queries = (counter.count - queries_start) / iterations
+
+    #
+    # Allocations are measured in a separate pass, tracing slows down every
+    # allocation and would skew the latencies
+    #
+    allocs = []
+    tracemalloc.start()
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        allocs.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(get_percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(get_percentile(latencies, 99) * 1000, 3),
+        'queries_per_request': round(queries, 2),
+        'peak_alloc_kb': round(get_percentile(allocs, 50) / 1024, 1),
+    }
+
+
+def get_b64_image(size) -> str:
+    f = BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(f, 'PNG')
+    return base64.b64encode(f.getvalue()).decode()
+
+
+def seed(args):
+    import populate_db
+    from models.User import User
+
+    usernames = ['{}{}'.format(BENCHMARK_PREFIX, i) for i in range(2)]
+    if User.objects(username__in=usernames).count() == len(usernames):
+        return
+
+    populate_args = argparse.Namespace(users=len(usernames), prefix=BENCHMARK_PREFIX, password=BENCHMARK_PASSWORD,
+                                       password_rounds=4, areas=args.areas, skew=0, image_ratio=0,
+                                       image_size=(1, 1), image_pool=0, geo_center=None, geo_radius=0,
+                                       age_days=0, batch_size=1000, seed=0)
+    populate_db.generate(populate_args)
+
+
+def wait_for_event(clients: list, name: str, timeout: float = 5):
+    pending = list(clients)
+    deadline = time.monotonic() + timeout
+
+    while pending:
+        if time.monotonic() > deadline:
+            raise RuntimeError('{} clients did not receive {}'.format(len(pending), name))
+
+        pending = [client for client in pending
+                   if not any(message['name'] == name for message in client.get_received())]
+        if pending:
+            eventlet.sleep(0.0005)
+
+
+def get_scenarios(args):
+    from flask_socketio import SocketIO
+
+    from app import app
+    from config import MAX_PAGINATED_LIMIT
+    from utils.dependencies import services_injector
+
+    client = app.test_client()
+    socket_server = services_injector.get(SocketIO)
+
+    def login(username: str):
+        response = check(client.post('/api/user/login', json={
+            'username': username,
+            'password': BENCHMARK_PASSWORD,
+        }))
+        return {
+            'Access-Token': response.headers['Access-Token'],
+            'Refresh-Token': response.headers['Refresh-Token'],
+        }
+
+    reader_headers = login('{}0'.format(BENCHMARK_PREFIX))
+    writer_headers = login('{}1'.format(BENCHMARK_PREFIX))
+
+    area = check(client.get('/api/areas?limit=1', headers=reader_headers)).json['items'][0]
+    state = {'updated_at_timestamp': area['updated_at_timestamp']}
+    image = get_b64_image(args.image_size)
+
+    def patch_area(with_image: bool):
+        data = {
+            'name': 'Benchmark',
+            'updated_at_timestamp': state['updated_at_timestamp'],
+        }
+        if with_image:
+            data['image'] = image
+
+        response = check(client.patch('/api/areas/{}'.format(area['id']), json=data, headers=reader_headers))
+        state['updated_at_timestamp'] = response.json['updated_at_timestamp']
+
+    lookups = {'count': 0}
+
+    def geocode_upstream():
+        lookups['count'] += 1
+        check(client.get('/api/geocode/forward?address=Benchmark+{}'.format(lookups['count']),
+                         headers=reader_headers))
+
+    def socket_authenticate():
+        socket_client = socket_server.test_client(app)
+        socket_client.emit('authenticate', reader_headers['Access-Token'])
+        socket_client.get_received()
+        socket_client.disconnect()
+
+    fanout_clients = []
+
+    def socket_fanout():
+        if not fanout_clients:
+            for _ in range(args.fanout_clients):
+                socket_client = socket_server.test_client(app)
+                socket_client.emit('authenticate', writer_headers['Access-Token'])
+                socket_client.get_received()
+                fanout_clients.append(socket_client)
+
+        check(client.post('/api/areas', json={
+            'name': 'Benchmark',
+            'category': 0,
+            'location': 'Benchmark',
+            'location_point': [23.59, 46.77],
+        }, headers=writer_headers))
+        wait_for_event(fanout_clients, 'area-added')
+
+    last_page = max(0, (args.areas - 1) // MAX_PAGINATED_LIMIT)
+
+    return {
+        'login_post': lambda: login('{}0'.format(BENCHMARK_PREFIX)),
+        'areas_get_first_page': lambda: check(client.get('/api/areas?page=0', headers=reader_headers)),
+        'areas_get_middle_page': lambda: check(client.get('/api/areas?page={}'.format(last_page // 2),
+                                                          headers=reader_headers)),
+        'areas_get_last_page': lambda: check(client.get('/api/areas?page={}'.format(last_page),
+                                                        headers=reader_headers)),
+        'areas_get_all': lambda: check(client.get('/api/areas/all', headers=reader_headers)).get_data(),
+        'areas_patch_area': lambda: patch_area(False),
+        'areas_patch_area_image': lambda: patch_area(True),
+        'geocode_forward_cached': lambda: check(client.get('/api/geocode/forward?address=Benchmark',
+                                                           headers=reader_headers)),
+        'geocode_forward_upstream': geocode_upstream,
+        'socket_authenticate': socket_authenticate,
+        'socket_fanout': socket_fanout,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    regressions = []
+
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+
+        for metric, metric_tolerance in regression_tolerances.items():
+            if metric_tolerance is None:
+                metric_tolerance = tolerance
+
+            old = baseline[name].get(metric)
+            new = metrics[metric]
+            if old is not None and new > old * (1 + metric_tolerance):
+                regressions.append('{} {}: {} -> {}'.format(name, metric, old, new))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the latency, queries and allocations per endpoint')
+    parser.add_argument('--db', choices=['mock', 'config'], default='mock',
+                        help='run against mongomock or the database from the config')
+    parser.add_argument('--areas', type=int, default=200, help='areas of the benchmark users')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--alloc-iterations', type=int, default=20)
+    parser.add_argument('--image-size', type=int, nargs=2, default=(640, 480))
+    parser.add_argument('--fanout-clients', type=int, default=20)
+    parser.add_argument('--scenarios', nargs='+', help='run only these scenarios')
+    parser.add_argument('--baseline', help='compare against the results stored in this JSON file')
+    parser.add_argument('--save-baseline', help='store the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slowdown over the baseline reported as a regression')
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    if args.db == 'mock':
+        import config
+        config.DB_MOCK = True
+        counter.install_mongomock()
+    else:
+        monitoring.register(counter)
+
+    #
+    # Forward the upstream lookups to a stub and do not rate limit them. The
+    # injector is replaced before anything imports it
+    #
+    import utils.dependencies
+    from utils.RateLimiter import RateLimiter
+    utils.dependencies.services_injector = utils.dependencies.create_services_injector(
+        geolocator=StubGeocoder(), geocode_rate_limiter=RateLimiter(1e9, 1000000, 0, 0))
+
+    #
+    # Importing the app connects to the database with its own listeners
+    #
+    import app
+    seed(args)
+
+    scenarios = get_scenarios(args)
+    if args.scenarios:
+        scenarios = {name: scenarios[name] for name in args.scenarios}
+
+    results = {}
+    print('{:<26} {:>9} {:>9} {:>8} {:>10}'.format('scenario', 'p50 ms', 'p99 ms', 'queries', 'alloc kb'))
+    for name, fn in scenarios.items():
+        metrics = measure(fn, args.iterations, args.warmup, args.alloc_iterations, counter)
+        results[name] = metrics
+        print('{:<26} {:>9} {:>9} {:>8} {:>10}'.format(name, metrics['p50_ms'], metrics['p99_ms'],
+                                                         metrics['queries_per_request'], metrics['peak_alloc_kb']))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print('REGRESSION {}'.format(regression))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import time
+from math import radians, sin, cos, asin, sqrt
+
+from database import connect_database_from_config
+from models.Area import Area
+from models.User import User
+from services.AreaService import AreaService
+from utils.geo import EARTH_RADIUS
+
+BENCHMARK_USERNAME = 'benchmark-geo'
+
+
+def haversine(longitude_a: float, latitude_a: float, longitude_b: float, latitude_b: float) -> float:
+    longitude_a, latitude_a, longitude_b, latitude_b = map(radians, (longitude_a, latitude_a, longitude_b, latitude_b))
+    a = sin((latitude_b - latitude_a) / 2) ** 2 + \
+        cos(latitude_a) * cos(latitude_b) * sin((longitude_b - longitude_a) / 2) ** 2
+    return 2 * EARTH_RADIUS * asin(sqrt(a))
+
+
+def seed(user: User, no_areas: int):
+    areas = []
+    for i in range(no_areas):
+        location_point = [random.uniform(20, 30), random.uniform(43, 48)]
+        areas.append(Area(owner=user, name='{} Benchmark'.format(i), category=0, location='Benchmark',
+                          location_point=location_point))
+
+    Area.objects.insert(areas, load_bulk=False)
+
+
+def fetch_all_and_filter(user: User, longitude: float, latitude: float, max_distance: float, limit: int):
+    matches = []
+    for area in Area.objects(owner=user):
+        point = area.location_point['coordinates']
+        distance = haversine(longitude, latitude, point[0], point[1])
+        if distance <= max_distance:
+            matches.append((distance, area))
+
+    matches.sort(key=lambda match: match[0])
+    return [area.to_dict(owner=user) for _, area in matches[:limit]]
+
+
+def query_near(service: AreaService, user: User, longitude: float, latitude: float, max_distance: float,
+               limit: int):
+    areas = service.find_near(user, longitude, latitude, max_distance).limit(limit)
+    return [area.to_dict(owner=user) for area in areas]
+
+
+def measure(name: str, fn, queries: list):
+    start = time.monotonic()
+    for longitude, latitude in queries:
+        fn(longitude, latitude)
+    elapsed = time.monotonic() - start
+
+    print('{:>16} queries={} total={:.3f}s per_query={:.2f}ms'
+          .format(name, len(queries), elapsed, elapsed / len(queries) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare $near queries against fetching all areas')
+    parser.add_argument('--areas', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--max-distance', type=float, default=20000)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    connect_database_from_config()
+
+    user = User(username=BENCHMARK_USERNAME, first_name='Benchmark', last_name='Geo', password=b'')
+    user.save()
+
+    try:
+        seed(user, args.areas)
+
+        service = AreaService(None)
+        queries = [(random.uniform(20, 30), random.uniform(43, 48)) for _ in range(args.queries)]
+
+        measure('fetch-all', lambda lon, lat: fetch_all_and_filter(user, lon, lat, args.max_distance, args.limit),
+                queries)
+        measure('$near', lambda lon, lat: query_near(service, user, lon, lat, args.max_distance, args.limit),
+                queries)
+    finally:
+        Area.objects(owner=user).delete()
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
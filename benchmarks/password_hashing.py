@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import eventlet
+
+eventlet.monkey_patch()
+
+import argparse
+import time
+
+from models.User import User
+from services.UserService import UserService
+from utils.BlockingExecutor import BlockingExecutor, EXECUTOR_MODE_INLINE, EXECUTOR_MODE_TPOOL
+from utils.LRUCache import LRUCache
+from validators.UserValidator import UserValidator
+
+
+def measure_hub_stall(stop: list, stalls: list, interval: float = 0.001):
+    last = time.monotonic()
+    while not stop:
+        eventlet.sleep(interval)
+        now = time.monotonic()
+        stalls.append(now - last - interval)
+        last = now
+
+
+def run(mode: str, workers: int, logins: int, concurrency: int, rounds: int):
+    executor = BlockingExecutor(mode, workers, logins)
+    service = UserService(UserValidator(), LRUCache(1), executor, rounds)
+
+    user = User(username='benchmark', first_name='Benchmark', last_name='User')
+    user.set_password('password', rounds)
+
+    stop = []
+    stalls = []
+    ticker = eventlet.spawn(measure_hub_stall, stop, stalls)
+    eventlet.sleep(0)
+
+    pool = eventlet.GreenPool(concurrency)
+    start = time.monotonic()
+    for _ in pool.imap(lambda _: service.verify_password(user, 'password'), range(logins)):
+        pass
+    elapsed = time.monotonic() - start
+
+    stop.append(True)
+    ticker.wait()
+
+    print('{:>7} logins={} concurrency={} rounds={} time={:.3f}s throughput={:.1f}/s max_hub_stall={:.1f}ms'
+          .format(mode, logins, concurrency, rounds, elapsed, logins / elapsed, max(stalls, default=0) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure concurrent login throughput per password executor')
+    parser.add_argument('--logins', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--modes', nargs='+', default=[EXECUTOR_MODE_INLINE, EXECUTOR_MODE_TPOOL])
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        run(mode, args.workers, args.logins, args.concurrency, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
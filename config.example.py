@@ -3,10 +3,49 @@ DB_USERNAME = None
 DB_PASSWORD = None
 DB_HOST = '127.0.0.1'
 DB_PORT = 27017
+DB_MOCK = False
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG_PATH = 'logs/slow_queries.log'
+SLOW_QUERY_EXPLAIN_RATE = 0
 JWT_SECRET_KEY = 'test'
 SECRET_KEY = 'test'
 MAX_PAGINATED_LIMIT = 5
+STREAM_BATCH_SIZE = 100
+COMPRESSION_ENCODINGS = ['br', 'zstd', 'gzip']
+COMPRESSION_LEVELS = {
+    'br': 4,
+    'zstd': 3,
+    'gzip': 6,
+}
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_MIMETYPES = ['application/json', 'application/x-ndjson', 'text/plain', 'text/html']
+AREA_NEAR_MAX_DISTANCE = 50000
+AREA_BATCH_MAX_ITEMS = 500
+AREA_EVENTS_QUEUE_SIZE = 1024
+MESSAGE_BUS = 'memory'
+MESSAGE_BUS_SOCKET_DIR = '/tmp/odomu-message-bus'
+AREA_UPDATE_COALESCE_WINDOW = 0.1
+AREA_SNAPSHOT_CACHE_SIZE = 4096
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60
+TOKEN_CACHE_SIZE = 4096
+FRESH_ACCESS_TOKEN_REUSE_MARGIN = 60
+PASSWORD_HASH_ROUNDS = 12
+PASSWORD_HASH_EXECUTOR = 'tpool'
+PASSWORD_HASH_WORKERS = 4
+PASSWORD_HASH_MAX_PENDING = 32
 GEOCODE_USER_AGENT = 'odomu-server-geocode-agent'
+GEOCODE_CACHE_SIZE = 4096
+GEOCODE_CACHE_TTL = 30 * 24 * 60 * 60
+GEOCODE_REVERSE_PRECISION = 4
+GEOCODE_RATE_LIMIT = 1
+GEOCODE_RATE_BURST = 1
+GEOCODE_MAX_WAIT = 5
+GEOCODE_MAX_QUEUE = 16
+GEOCODE_GAZETTEER_PATH = None
+GEOCODE_GAZETTEER_MAX_DISTANCE = 100
+GEOCODE_BATCH_MAX_ITEMS = 100
+GEOCODE_BATCH_WORKERS = 4
 HOST = '0.0.0.0'
 PORT = 5000
 ACCESS_TOKEN_HEADER_NAMES = [
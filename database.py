@@ -1,13 +1,43 @@
 from mongoengine import connect
 
-from config import DB_NAME, DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT
+from config import DB_NAME, DB_USERNAME, DB_PASSWORD, DB_HOST, DB_PORT, DB_MOCK, SLOW_QUERY_THRESHOLD, \
+    SLOW_QUERY_LOG_PATH, SLOW_QUERY_EXPLAIN_RATE
+from utils.SlowQueryLogger import SlowQueryLogger
 
 
-def connect_database_from_config():
+def connect_database_from_config(event_listeners=None):
+    event_listeners = list(event_listeners or [])
+
+    slow_query_logger = None
+    if SLOW_QUERY_THRESHOLD is not None:
+        slow_query_logger = SlowQueryLogger(SLOW_QUERY_LOG_PATH, SLOW_QUERY_THRESHOLD, SLOW_QUERY_EXPLAIN_RATE)
+        event_listeners.append(slow_query_logger)
+
+    if DB_MOCK:
+        #
+        # In-memory stand-in for benchmarks and local runs without a mongod,
+        # geo queries are not supported
+        #
+        import mongomock
+        import mongomock.gridfs
+
+        mongomock.gridfs.enable_gridfs_integration()
+
+        connect(
+            db=DB_NAME,
+            host='mongodb://localhost',
+            mongo_client_class=mongomock.MongoClient,
+            event_listeners=event_listeners,
+        )
+        return slow_query_logger
+
     connect(
         db=DB_NAME,
         username=DB_USERNAME,
         password=DB_PASSWORD,
         host=DB_HOST,
         port=DB_PORT,
+        event_listeners=event_listeners,
     )
+
+    return slow_query_logger
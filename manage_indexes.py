@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import argparse
+import json
+
+from bson import ObjectId
+
+from database import connect_database_from_config
+from models.Area import Area
+from models.GeocodeResult import GeocodeResult
+from models.User import User
+from utils.explain import get_winning_plan, get_winning_stages
+
+models = [User, Area, GeocodeResult]
+
+
+def create_indexes(args):
+    for model in models:
+        model.ensure_indexes()
+        print('{}: indexes created'.format(model.__name__))
+
+
+def diff_indexes(args):
+    for model in models:
+        diff = model.compare_indexes()
+        print('{}: missing {} extra {}'.format(model.__name__, diff['missing'], diff['extra']))
+
+
+def report_index_stats(args):
+    for model in models:
+        collection = model._get_collection()
+        for stats in collection.aggregate([{'$indexStats': {}}]):
+            print('{}: {} ops={} since={}'.format(model.__name__, stats['name'], stats['accesses']['ops'],
+                                                  stats['accesses']['since']))
+
+
+def explain_queries(args):
+    owner = User.objects(username=args.username).first() if args.username else User.objects.first()
+    if owner is None:
+        print('No user to explain the queries for')
+        return
+
+    queries = {
+        'areas by owner': Area.objects(owner=owner).order_by('-id').limit(args.limit),
+        'area by id and owner': Area.objects(owner=owner, id=ObjectId()),
+        'areas by owner last updated': Area.objects(owner=owner).order_by('-updated_at').limit(1),
+        'areas near': Area.objects(owner=owner, location_point__near=[0, 0], location_point__max_distance=1000),
+    }
+
+    for name, qs in queries.items():
+        explain = qs.explain()
+        winning_plan = get_winning_plan(explain)
+        stages = get_winning_stages(winning_plan)
+        print('{}: {}'.format(name, ' <- '.join(stages)))
+        if args.verbose:
+            print(json.dumps(winning_plan, indent=2, default=str))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the database indexes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('create', help='create all declared indexes').set_defaults(fn=create_indexes)
+    subparsers.add_parser('diff', help='compare declared and existing indexes').set_defaults(fn=diff_indexes)
+    subparsers.add_parser('stats', help='report index usage from $indexStats').set_defaults(fn=report_index_stats)
+
+    explain_parser = subparsers.add_parser('explain', help='explain the common area queries')
+    explain_parser.add_argument('--username')
+    explain_parser.add_argument('--limit', type=int, default=5)
+    explain_parser.add_argument('--verbose', action='store_true')
+    explain_parser.set_defaults(fn=explain_queries)
+
+    args = parser.parse_args()
+
+    connect_database_from_config()
+    args.fn(args)
+
+
+if __name__ == '__main__':
+    main()
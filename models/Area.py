@@ -1,9 +1,12 @@
-from base64 import b64decode, b64encode
+from base64 import b64decode
 from datetime import datetime
 from tempfile import TemporaryFile
 
-from mongoengine import Document, StringField, IntField, PointField, ReferenceField, ImageField, GridFSError, \
-    GridFSProxy, DateTimeField
+from gridfs import GridOut
+
+from mongoengine import Document, StringField, IntField, PointField, ReferenceField, ImageField, GridFSProxy, \
+    DateTimeField
+from mongoengine.errors import SaveConditionError
 
 from utils.DualMap import DualMap
 
@@ -15,6 +18,16 @@ area_categories_map = DualMap({
 }, (-1, 'unknown'))
 
 
+def get_version_condition(version: int) -> dict:
+    #
+    # Areas saved before versioning have no version field, which reads as 0
+    #
+    if not version:
+        return {'version__in': [0, None]}
+
+    return {'version': version}
+
+
 class Area(Document):
     owner = ReferenceField('User', required=True)
     name = StringField(required=True)
@@ -22,10 +35,31 @@ class Area(Document):
                         min_value=area_categories_map.minimum_key(),
                         max_value=area_categories_map.maximum_key())
     location = StringField(required=True)
-    location_point = PointField()
+    location_point = PointField(auto_index=False)
     image = ImageField(size=(1920, 1080, False))
+    image_size = IntField()
     created_at = DateTimeField(default=datetime.now)
     updated_at = DateTimeField(default=datetime.now)
+    version = IntField(default=0)
+
+    meta = {
+        'indexes': [
+            ['owner', '-id'],
+            ['owner', '-updated_at'],
+            ['owner', '(location_point'],
+        ],
+    }
+
+    @property
+    def owner_id(self):
+        #
+        # Read the id from the stored reference without dereferencing it
+        #
+        owner = self._data.get('owner')
+        if owner is None:
+            return None
+
+        return owner.id
 
     def get_timestamp_common(self, field) -> int:
         return int(field.timestamp())
@@ -38,32 +72,59 @@ class Area(Document):
     def updated_at_timestamp(self):
         return self.get_timestamp_common(self.updated_at)
 
-    def put_b64_image(self, b64_string: str):
+    def put_b64_image(self, b64_string: str) -> GridFSProxy:
         byte_string = b64decode(b64_string)
         byte_array = bytearray(byte_string)
 
+        #
+        # Store the new image as a separate file, the stored area keeps
+        # referencing the previous one until it is saved. The caller deletes
+        # the returned previous image once the save succeeds, or the new one
+        # if it does not
+        #
+        previous_image = self.image
+        self.image = None
+
         with TemporaryFile() as f:
             f.write(byte_array)
             f.flush()
             f.seek(0)
             try:
                 self.image.put(f)
-            except GridFSError:
-                self.image.replace(f)
+            except Exception:
+                self.image = previous_image
+                raise
 
-    def get_b64_image_common(self, image: GridFSProxy):
+        self.image_size = self.image.length
+
+        return previous_image
+
+    def get_image_common(self, image: GridFSProxy, image_size: int):
         if not image:
             return None
 
-        byte_array = image.read()
-        if not byte_array:
-            return None
+        #
+        # Areas saved before the size was stored need a lookup of the GridFS file
+        #
+        if image_size is None:
+            image_size = image.length
 
-        byte_string = bytes(byte_array)
-        b64_string = b64encode(byte_string)
-        return b64_string.decode('utf-8')
+        return {
+            'id': str(image.grid_id),
+            'size': image_size,
+        }
+
+    def get_image_mimetype(self, image: GridOut):
+        image_format = getattr(image, 'format', None)
+        if not image_format:
+            return 'application/octet-stream'
+
+        return 'image/{}'.format(image_format.lower())
+
+    def to_dict(self, owner=None):
+        if owner is None:
+            owner = self.owner
 
-    def to_dict(self):
         #
         # HACK: location point is list when the object was created, but gets saved
         # as a dict with a coordinates key containing the list
@@ -77,7 +138,7 @@ class Area(Document):
 
         return {
             'id': str(self.id),
-            'owner': self.owner.to_dict(),
+            'owner': owner.to_dict(),
             'name': self.name,
             'category': self.category,
             'no_devices': 0,
@@ -86,7 +147,8 @@ class Area(Document):
             'location_point': location_points,
             'created_at_timestamp': self.created_at_timestamp,
             'updated_at_timestamp': self.updated_at_timestamp,
-            'image': self.get_b64_image_common(self.image),
+            'image': self.get_image_common(self.image, self.image_size),
+            'version': self.version or 0,
         }
 
     def save(self, *args, **kwargs):
@@ -94,4 +156,19 @@ class Area(Document):
             self.created_at = datetime.now()
 
         self.updated_at = datetime.now()
-        return super().save(*args, **kwargs)
+
+        #
+        # Only overwrite the version this copy was read at, so that concurrent
+        # updates of the same area fail instead of both producing the same
+        # version
+        #
+        previous_version = self.version
+        if not self._created and 'save_condition' not in kwargs:
+            kwargs['save_condition'] = get_version_condition(previous_version)
+
+        self.version = (previous_version or 0) + 1
+        try:
+            return super().save(*args, **kwargs)
+        except SaveConditionError:
+            self.version = previous_version
+            raise
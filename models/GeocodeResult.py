@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, DictField, DateTimeField
+
+from config import GEOCODE_CACHE_TTL
+
+
+class GeocodeResult(Document):
+    key = StringField(required=True, unique=True)
+    result = DictField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'indexes': [
+            {
+                'fields': ['created_at'],
+                'expireAfterSeconds': GEOCODE_CACHE_TTL,
+            },
+        ],
+    }
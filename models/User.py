@@ -15,9 +15,9 @@ class User(Document):
     first_name = StringField(required=True)
     last_name = StringField(required=True)
 
-    def set_password(self, password):
+    def set_password(self, password, rounds: int = 12):
         password = encode_string(password)
-        self.password = bcrypt.hashpw(password, bcrypt.gensalt())
+        self.password = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
 
     def is_correct_password(self, password):
         password = encode_string(password)
@@ -1,36 +1,228 @@
 #!/usr/bin/env python3
+import argparse
+import math
+import random
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from PIL import Image
+
 from database import connect_database_from_config
+from models.Area import Area, area_categories_map
+from models.User import User
 from services.AreaService import AreaService
 from services.UserService import UserService
 from utils.dependencies import services_injector
 from utils.errors import UserAddFailed, AreaAddFailed, UserAlreadyExists
+from utils.geo import EARTH_RADIUS
 
-connect_database_from_config()
-
-user_service = services_injector.get(UserService)
-area_service = services_injector.get(AreaService)
-
-users_data = [
+default_users_data = [
     ['admin', 'test', 'Admin', 'Test'],
     ['ct', 'test', 'Cosmin', 'Tanislav'],
 ]
-users = []
 
-for user_data in users_data:
+area_names = ['My home', 'My office', 'Living room', 'Kitchen', 'Bedroom', 'Garage', 'Garden', 'Basement']
+area_locations = [
+    'Aleea Putna, Nr. 4, Cluj-Napoca',
+    'Bulevardul 21 Decembrie 1989 77, Cluj-Napoca',
+    'Strada Memorandumului 28, Cluj-Napoca',
+    'Piata Unirii 1, Cluj-Napoca',
+]
+
+
+def add_default_data():
+    user_service = services_injector.get(UserService)
+    area_service = services_injector.get(AreaService)
+
+    users = []
+
+    for user_data in default_users_data:
+        try:
+            user = user_service.add(user_data[0], user_data[1], user_data[2], user_data[3])
+        except (UserAddFailed, UserAlreadyExists) as e:
+            user = user_service.find_one_by(username=user_data[0])
+            print(e)
+
+        users.append(user)
+
+    for user in users:
+        try:
+            for i in range(10):
+                area_service.add(user, '{} My home'.format(i), 0, 'Aleea Putna, Nr. 4, Cluj-Napoca',
+                                 [30.4, 20.5])
+                area_service.add(user, '{} My office'.format(i), 0, 'Bulevardul 21 Decembrie 1989 77, Cluj-Napoca',
+                                 [35.4, 20.5])
+        except AreaAddFailed as e:
+            print(e)
+
+
+def parse_size(value: str):
     try:
-        user = user_service.add(user_data[0], user_data[1], user_data[2], user_data[3])
-    except (UserAddFailed, UserAlreadyExists) as e:
-        user = user_service.find_one_by(username=user_data[0])
-        print(e)
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Must be WIDTHxHEIGHT')
 
-    users.append(user)
 
-for user in users:
+def parse_point(value: str):
     try:
-        for i in range(10):
-            area_service.add(user, '{} My home'.format(i), 0, 'Aleea Putna, Nr. 4, Cluj-Napoca',
-                             [30.4, 20.5])
-            area_service.add(user, '{} My office'.format(i), 0, 'Bulevardul 21 Decembrie 1989 77, Cluj-Napoca',
-                             [35.4, 20.5])
-    except AreaAddFailed as e:
-        print(e)
+        longitude, latitude = value.split(',')
+        return float(longitude), float(latitude)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Must be LONGITUDE,LATITUDE')
+
+
+def get_areas_count(rng: random.Random, mean: int, skew: float) -> int:
+    if skew <= 1:
+        return mean
+
+    #
+    # Pareto distributed counts, most users own a few areas and a few users
+    # own a lot of them, scaled so that the mean stays the requested one
+    #
+    return int(round(mean * (skew - 1) / skew * rng.paretovariate(skew)))
+
+
+def get_random_point(rng: random.Random, center, radius: float):
+    distance = radius * 1000 * math.sqrt(rng.random()) / EARTH_RADIUS
+    bearing = rng.uniform(0, 2 * math.pi)
+
+    longitude = math.radians(center[0])
+    latitude = math.radians(center[1])
+
+    point_latitude = math.asin(math.sin(latitude) * math.cos(distance) +
+                               math.cos(latitude) * math.sin(distance) * math.cos(bearing))
+    point_longitude = longitude + math.atan2(math.sin(bearing) * math.sin(distance) * math.cos(latitude),
+                                             math.cos(distance) - math.sin(latitude) * math.sin(point_latitude))
+
+    return [
+        (math.degrees(point_longitude) + 540) % 360 - 180,
+        math.degrees(point_latitude),
+    ]
+
+
+def generate_images(rng: random.Random, count: int, size):
+    images = []
+
+    for _ in range(count):
+        image = Image.frombytes('RGB', size, bytes(rng.getrandbits(8) for _ in range(size[0] * size[1] * 3)))
+
+        f = BytesIO()
+        image.save(f, 'JPEG')
+        images.append(f.getvalue())
+
+    return images
+
+
+def generate_users(rng: random.Random, args):
+    users = []
+
+    #
+    # Hashing the password is slow on purpose, hash it once and share it
+    #
+    template_user = User()
+    template_user.set_password(args.password, args.password_rounds)
+
+    existing_usernames = set(User.objects(username__startswith=args.prefix).distinct('username'))
+
+    for i in range(args.users):
+        username = '{}{}'.format(args.prefix, i)
+        if username in existing_usernames:
+            print('User {} already exists, skipping'.format(username))
+            continue
+
+        users.append(User(username=username, password=template_user.password,
+                          first_name='First {}'.format(i), last_name='Last {}'.format(rng.randrange(1000))))
+
+    if users:
+        User.objects.insert(users, load_bulk=False)
+
+    return users
+
+
+def generate_areas(rng: random.Random, args, users):
+    images = []
+    if args.image_ratio > 0:
+        images = generate_images(rng, args.image_pool, args.image_size)
+
+    now = datetime.now()
+    categories = list(area_categories_map.keys())
+
+    areas = []
+    total = 0
+
+    def flush():
+        nonlocal areas, total
+        if areas:
+            Area.objects.insert(areas, load_bulk=False)
+            total += len(areas)
+            areas = []
+
+    for user in users:
+        for i in range(get_areas_count(rng, args.areas, args.skew)):
+            if args.geo_center:
+                location_point = get_random_point(rng, args.geo_center, args.geo_radius)
+            else:
+                location_point = [30.4, 20.5]
+
+            created_at = now - timedelta(seconds=rng.randrange(args.age_days * 24 * 3600 + 1))
+
+            area = Area(owner=user, name='{} {}'.format(i, rng.choice(area_names)),
+                        category=rng.choice(categories), location=rng.choice(area_locations),
+                        location_point=location_point, created_at=created_at, updated_at=created_at, version=1)
+
+            if images and rng.random() < args.image_ratio:
+                area.image.put(BytesIO(rng.choice(images)))
+                area.image_size = area.image.length
+
+            areas.append(area)
+
+            if len(areas) >= args.batch_size:
+                flush()
+
+    flush()
+
+    return total
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+
+    users = generate_users(rng, args)
+    print('Created {} users'.format(len(users)))
+
+    total = generate_areas(rng, args, users)
+    print('Created {} areas'.format(total))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Populate the database, with the default data when no users '
+                                                 'count is passed, with generated data otherwise')
+    parser.add_argument('--users', type=int, help='number of users to generate')
+    parser.add_argument('--areas', type=int, default=20, help='mean number of areas per user')
+    parser.add_argument('--skew', type=float, default=1.5,
+                        help='pareto shape of the areas per user distribution, no skew when at most 1')
+    parser.add_argument('--prefix', default='user', help='prefix of the generated usernames')
+    parser.add_argument('--password', default='test')
+    parser.add_argument('--password-rounds', type=int, default=4)
+    parser.add_argument('--image-ratio', type=float, default=0, help='fraction of areas that get an image')
+    parser.add_argument('--image-size', type=parse_size, default=(640, 480), help='WIDTHxHEIGHT')
+    parser.add_argument('--image-pool', type=int, default=8, help='number of distinct images to generate')
+    parser.add_argument('--geo-center', type=parse_point, help='LONGITUDE,LATITUDE to scatter the areas around')
+    parser.add_argument('--geo-radius', type=float, default=50, help='kilometers')
+    parser.add_argument('--age-days', type=int, default=0, help='spread the creation dates over this many days')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+
+    connect_database_from_config()
+
+    if args.users is None:
+        add_default_data()
+    else:
+        generate(args)
+
+
+if __name__ == '__main__':
+    main()
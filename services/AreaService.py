@@ -1,29 +1,59 @@
+from datetime import datetime
 from enum import Enum
+from math import ceil, sin, radians
 from typing import Union, List
 
+from bson import ObjectId
+from mongoengine.errors import SaveConditionError
+from mongoengine.queryset import transform
+from pymongo import UpdateOne
 from pyee import BaseEventEmitter
 
-from models.Area import Area
+from models.Area import Area, get_version_condition
 from models.User import User
+from utils.AsyncEventEmitter import AsyncEventEmitter
 from utils.errors import AreaCategoryInvalid, AreaAddFailed, AreaNameInvalid, AreaLocationInvalid, \
-    AreaUpdateFailed, AreaOwnerInvalid, AreaLocationPointInvalid, AreaImageInvalid, AreaUpdatedAtTimestampInvalid
+    AreaUpdateFailed, AreaOwnerInvalid, AreaLocationPointInvalid, AreaImageInvalid, AreaUpdatedAtTimestampInvalid, \
+    AreaBatchFailed, AreaDoesNotExist, AreaBatchItemDuplicate, AreaUpdateConflict
+from utils.geo import EARTH_RADIUS
 from validators.AreaValidator import AreaValidator
 
 
+BOX_EDGE_STEP = 0.5
+
+
+def get_parallel_points(latitude: float, from_longitude: float, to_longitude: float) -> List[tuple]:
+    steps = max(1, ceil(abs(to_longitude - from_longitude) / BOX_EDGE_STEP))
+    points = [(from_longitude + (to_longitude - from_longitude) * i / steps, latitude) for i in range(steps)]
+    return points + [(to_longitude, latitude)]
+
+
+def get_box_area_ratio(min_longitude: float, min_latitude: float, max_longitude: float, max_latitude: float) -> float:
+    return (max_longitude - min_longitude) / 360 * (sin(radians(max_latitude)) - sin(radians(min_latitude))) / 2
+
+
 class AreaServiceEvents(Enum):
     AREA_ADDED = 'area-added'
     AREA_DELETED = 'area-deleted'
     AREA_UPDATED = 'area-updated'
+    AREAS_ADDED = 'areas-added'
+    AREAS_DELETED = 'areas-deleted'
+    AREAS_UPDATED = 'areas-updated'
 
 
 class AreaService:
-    def __init__(self, validator: AreaValidator):
+    def __init__(self, validator: AreaValidator, emitter: Union[BaseEventEmitter, AsyncEventEmitter] = None,
+                 bulk_writes: bool = True):
         self.__validator = validator
+        self.__bulk_writes = bulk_writes
 
-        self.emitter = BaseEventEmitter()
+        if emitter is None:
+            emitter = BaseEventEmitter()
 
-    def add(self, owner: User, name: str, category: Union[str, int], location: str, location_point: List[float],
-            image: str = None):
+        self.emitter = emitter
+
+    def build(self, owner: User, name: str, category: Union[str, int], location: str, location_point: List[float],
+              image: str = None):
         me = AreaAddFailed()
 
         try:
@@ -53,7 +83,11 @@ class AreaService:
 
         area = Area(owner=owner, name=name, category=category, location=location, location_point=location_point)
 
-        if image:
+        #
+        # Only write the image once the rest is valid, nothing references it
+        # when the area is rejected
+        #
+        if image and me.is_empty():
             try:
                 area.put_b64_image(image)
             except Exception as e:
@@ -63,20 +97,125 @@ class AreaService:
         if not me.is_empty():
             raise me
 
+        return area
+
+    def add(self, owner: User, name: str, category: Union[str, int], location: str, location_point: List[float],
+            image: str = None):
+        area = self.build(owner, name, category, location, location_point, image)
+
         area.save()
 
         self.emitter.emit(AreaServiceEvents.AREA_ADDED, area)
 
         return area
 
+    def add_many(self, owner: User, items: List[dict]):
+        be = AreaBatchFailed()
+        areas = []
+
+        for index, item in enumerate(items):
+            try:
+                area = self.build(owner, item.get('name'), item.get('category'), item.get('location'),
+                                  item.get('location_point'), item.get('image'))
+                areas.append(area)
+            except AreaAddFailed as e:
+                be.add_item_error(index, e)
+
+        if not be.is_empty():
+            #
+            # Images are written to GridFS while validating, drop the ones of
+            # the areas that will not be inserted
+            #
+            for area in areas:
+                if area.image:
+                    area.image.delete()
+
+            raise be
+
+        #
+        # Bulk inserts skip save(), fill in what it would have set
+        #
+        now = datetime.now()
+        for area in areas:
+            area.created_at = now
+            area.updated_at = now
+            area.version = 1
+
+        if areas:
+            Area.objects.insert(areas, load_bulk=False)
+
+        self.emitter.emit(AreaServiceEvents.AREAS_ADDED, owner, areas)
+
+        return areas
+
     def find_one_by(self, *args, **kwargs):
         return Area.objects.get(*args, **kwargs)
 
     def find_by(self, *args, **kwargs):
         return Area.objects(*args, **kwargs)
 
-    def update(self, area: Area, name: str, category: Union[str, int], location: str, location_point: List[float],
-               image: str, updated_at_timestamp: int):
+    def get_revision(self, owner: User):
+        #
+        # Both lookups are answered from the owner indexes, any add, update or
+        # delete changes at least one of them
+        #
+        no_areas = self.find_by(owner=owner).count()
+        last_updated_at = self.find_by(owner=owner).order_by('-updated_at').scalar('updated_at').first()
+
+        return no_areas, last_updated_at
+
+    def find_near(self, owner: User, longitude: float, latitude: float, max_distance: float):
+        return self.find_by(owner=owner, location_point__near=[longitude, latitude],
+                            location_point__max_distance=max_distance)
+
+    def find_near_for_count(self, owner: User, longitude: float, latitude: float, max_distance: float):
+        #
+        # $near cannot be counted, match the same areas with $geoWithin instead
+        #
+        return self.find_by(owner=owner,
+                            location_point__geo_within_sphere=[(longitude, latitude), max_distance / EARTH_RADIUS])
+
+    def find_within_box(self, owner: User, min_longitude: float, min_latitude: float, max_longitude: float,
+                        max_latitude: float):
+        #
+        # Polygon edges are great circle arcs, which bulge towards the pole
+        # between two points of the same latitude. Split the horizontal edges
+        # so that the box follows its parallels, the vertical edges are
+        # meridians already
+        #
+        polygon = [
+            get_parallel_points(min_latitude, min_longitude, max_longitude) +
+            get_parallel_points(max_latitude, max_longitude, min_longitude) +
+            [(min_longitude, min_latitude)]
+        ]
+        return self.find_by(owner=owner, location_point__geo_within_polygon=polygon)
+
+    def find_many_by_ids(self, owner: User, ids: List[str], be: AreaBatchFailed):
+        indices_map = {}
+        for index, area_id in enumerate(ids):
+            if not isinstance(area_id, str) or not ObjectId.is_valid(area_id):
+                be.add_item_error(index, AreaDoesNotExist())
+            elif area_id in indices_map:
+                be.add_item_error(index, AreaBatchItemDuplicate())
+            else:
+                indices_map[area_id] = index
+
+        areas_map = {str(area.id): area for area in self.find_by(owner=owner, id__in=list(indices_map))}
+
+        areas = []
+        for area_id, index in indices_map.items():
+            area = areas_map.get(area_id)
+            if area is None:
+                be.add_item_error(index, AreaDoesNotExist())
+                continue
+
+            area.owner = owner
+            areas.append(area)
+
+        return areas
+
+    def apply_update(self, area: Area, name: str, category: Union[str, int], location: str,
+                     location_point: List[float], image: str, updated_at_timestamp: int):
         me = AreaUpdateFailed()
 
         if name is not None:
@@ -115,9 +254,10 @@ class AreaService:
         if not me.is_empty():
             raise me
 
+        previous_image = None
         if image:
             try:
-                area.put_b64_image(image)
+                previous_image = area.put_b64_image(image)
             except Exception as e:
                 ae = AreaImageInvalid(original_message=str(e))
                 me.add_error(ae)
@@ -125,11 +265,152 @@ class AreaService:
         if not me.is_empty():
             raise me
 
-        area.save()
+        return previous_image
+
+    def update(self, area: Area, name: str, category: Union[str, int], location: str, location_point: List[float],
+               image: str, updated_at_timestamp: int):
+        previous_image = self.apply_update(area, name, category, location, location_point, image,
+                                           updated_at_timestamp)
+
+        try:
+            area.save()
+        except SaveConditionError:
+            if image:
+                area.image.delete()
+
+            raise AreaUpdateConflict()
+
+        if previous_image:
+            previous_image.delete()
 
         self.emitter.emit(AreaServiceEvents.AREA_UPDATED, area)
 
+    def update_many(self, owner: User, items: List[dict]):
+        be = AreaBatchFailed()
+
+        ids = [item.get('id') for item in items]
+        areas = self.find_many_by_ids(owner, ids, be)
+
+        replaced_images = []
+        for area in areas:
+            index = ids.index(str(area.id))
+            item = items[index]
+            try:
+                previous_image = self.apply_update(area, item.get('name'), item.get('category'),
+                                                   item.get('location'), item.get('location_point'),
+                                                   item.get('image'), item.get('updated_at_timestamp'))
+            except AreaUpdateFailed as e:
+                be.add_item_error(index, e)
+                continue
+
+            if item.get('image'):
+                replaced_images.append((area, previous_image))
+
+        if not be.is_empty():
+            #
+            # New images are written to GridFS while validating, drop them,
+            # the stored areas still reference their previous images
+            #
+            for area, _ in replaced_images:
+                area.image.delete()
+
+            raise be
+
+        #
+        # MongoDB stores dates with millisecond precision, truncate so that the
+        # written updated_at can be compared with the stored one
+        #
+        now = datetime.now()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+        updates = []
+        for area in areas:
+            query = transform.query(Area, pk=area.pk, **get_version_condition(area.version))
+            area.updated_at = now
+            area.version = (area.version or 0) + 1
+
+            sets, unsets = area._delta()
+            update = {'$set': sets}
+            if unsets:
+                update['$unset'] = unsets
+
+            updates.append((area, query, update))
+
+        conflicted_areas = []
+        if self.__bulk_writes:
+            operations = [UpdateOne(query, update) for _, query, update in updates]
+            if operations:
+                result = Area._get_collection().bulk_write(operations, ordered=False)
+                if result.matched_count < len(operations):
+                    conflicted_areas = self.find_conflicted(areas, now)
+        else:
+            #
+            # mongomock cannot run the update operations of current pymongo
+            # versions in a bulk, fall back to one conditional update per area
+            #
+            for area, query, update in updates:
+                if Area._get_collection().update_one(query, update).matched_count == 0:
+                    conflicted_areas.append(area)
+
+        for area in conflicted_areas:
+            be.add_item_error(ids.index(str(area.id)), AreaUpdateConflict())
+
+        for area, previous_image in replaced_images:
+            if area in conflicted_areas:
+                area.image.delete()
+            elif previous_image:
+                previous_image.delete()
+
+        areas = [area for area in areas if area not in conflicted_areas]
+        for area in areas:
+            area._clear_changed_fields()
+
+        if areas:
+            self.emitter.emit(AreaServiceEvents.AREAS_UPDATED, owner, areas)
+
+        #
+        # The other areas of the batch are written, report the ones that were
+        # updated concurrently so that the client refetches them
+        #
+        if not be.is_empty():
+            raise be
+
+        return areas
+
+    def find_conflicted(self, areas: List[Area], updated_at: datetime) -> List[Area]:
+        #
+        # An unordered bulk write only reports how many updates matched, an
+        # area was written by this batch if it carries its version and time
+        #
+        written = {(area_id, version, area_updated_at) for area_id, version, area_updated_at in
+                   self.find_by(id__in=[area.id for area in areas]).scalar('id', 'version', 'updated_at')}
+
+        return [area for area in areas if (area.id, area.version, updated_at) not in written]
+
     def delete(self, area: Area):
         area.delete()
 
         self.emitter.emit(AreaServiceEvents.AREA_DELETED, area)
+
+    def delete_many(self, owner: User, ids: List[str]):
+        be = AreaBatchFailed()
+
+        areas = self.find_many_by_ids(owner, ids, be)
+
+        if not be.is_empty():
+            raise be
+
+        #
+        # Deleting through the queryset does not clean up GridFS files like
+        # Document.delete() does
+        #
+        for area in areas:
+            if area.image:
+                area.image.delete()
+
+        if areas:
+            self.find_by(owner=owner, id__in=[area.id for area in areas]).delete()
+
+        self.emitter.emit(AreaServiceEvents.AREAS_DELETED, owner, areas)
+
+        return areas
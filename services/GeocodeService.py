@@ -0,0 +1,225 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Union, List
+
+from geopy.exc import GeopyError
+
+from models.GeocodeResult import GeocodeResult
+from utils.Gazetteer import Gazetteer
+from utils.LRUCache import LRUCache
+from utils.RateLimiter import RateLimiter
+from utils.SingleFlight import SingleFlight
+from utils.errors import GeocodeUnavailable, APIError
+
+
+class GeocodeLookupType(Enum):
+    FORWARD = 'forward'
+    REVERSE = 'reverse'
+
+
+def normalize_address(address: str) -> str:
+    return ' '.join(address.lower().split())
+
+
+class GeocodeService:
+    def __init__(self, geocoder, cache: LRUCache, rate_limiter: RateLimiter, reverse_precision: int,
+                 gazetteer: Gazetteer = None, gazetteer_max_distance: float = 0, batch_workers: int = 1):
+        self.__geocoder = geocoder
+        self.__cache = cache
+        self.__rate_limiter = rate_limiter
+        self.__single_flight = SingleFlight()
+        self.__reverse_precision = reverse_precision
+        self.__gazetteer = gazetteer
+        self.__gazetteer_max_distance = gazetteer_max_distance
+        self.__batch_executor = ThreadPoolExecutor(max_workers=batch_workers)
+
+        self.gazetteer_hits = 0
+        self.persistent_hits = 0
+        self.upstream_calls = 0
+
+    def get_forward_key(self, address: str) -> str:
+        return 'forward:{}'.format(normalize_address(address))
+
+    def quantize_coordinates(self, latitude: float, longitude: float):
+        return round(latitude, self.__reverse_precision), round(longitude, self.__reverse_precision)
+
+    def get_reverse_key(self, latitude: float, longitude: float) -> str:
+        return 'reverse:{:.{precision}f},{:.{precision}f}'.format(latitude, longitude,
+                                                                  precision=self.__reverse_precision)
+
+    def find_cached(self, key: str) -> Union[dict, None]:
+        result = self.__cache.get(key)
+        if result is not None:
+            return result
+
+        document = GeocodeResult.objects(key=key).first()
+        if document is None:
+            return None
+
+        self.persistent_hits += 1
+        self.__cache.set(key, document.result)
+
+        return document.result
+
+    def store_cached(self, key: str, result: dict):
+        self.__cache.set(key, result)
+        GeocodeResult.objects(key=key).update_one(set__result=result, set__created_at=datetime.utcnow(),
+                                                  upsert=True)
+
+    def geocode_forward(self, address: str) -> Union[dict, None]:
+        self.upstream_calls += 1
+
+        location = self.__geocoder.geocode(address)
+        if not location:
+            return None
+
+        return {
+            'address': location.raw['display_name'],
+            'latitude': location.raw['lat'],
+            'longitude': location.raw['lon'],
+        }
+
+    def geocode_reverse(self, latitude: float, longitude: float) -> Union[dict, None]:
+        self.upstream_calls += 1
+
+        location = self.__geocoder.reverse((latitude, longitude))
+        if not location:
+            return None
+
+        return {
+            'address': location.raw['display_name'],
+        }
+
+    def resolve_upstream(self, key: str, geocode_fn, *args) -> Union[dict, None]:
+        if not self.__rate_limiter.acquire():
+            raise GeocodeUnavailable()
+
+        try:
+            result = geocode_fn(*args)
+        except GeopyError as e:
+            raise GeocodeUnavailable(original_message=str(e))
+
+        if result is not None:
+            self.store_cached(key, result)
+
+        return result
+
+    def resolve(self, key: str, geocode_fn, *args) -> Union[dict, None]:
+        result = self.find_cached(key)
+        if result is not None:
+            return result
+
+        #
+        # Concurrent lookups for the same key wait for a single upstream call
+        #
+        return self.__single_flight.do(key, self.resolve_upstream, key, geocode_fn, *args)
+
+    def reverse_local(self, latitude: float, longitude: float) -> Union[dict, None]:
+        if self.__gazetteer is None:
+            return None
+
+        nearest = self.__gazetteer.nearest(latitude, longitude)
+        if nearest is None:
+            return None
+
+        address, distance = nearest
+        if distance > self.__gazetteer_max_distance:
+            return None
+
+        self.gazetteer_hits += 1
+
+        return {
+            'address': address,
+        }
+
+    def get_forward_lookup(self, address: str):
+        return self.get_forward_key(address), self.geocode_forward, (address,)
+
+    def get_reverse_lookup(self, latitude: float, longitude: float):
+        latitude, longitude = self.quantize_coordinates(latitude, longitude)
+        return self.get_reverse_key(latitude, longitude), self.geocode_reverse, (latitude, longitude)
+
+    def forward(self, address: str) -> Union[dict, None]:
+        key, geocode_fn, args = self.get_forward_lookup(address)
+        return self.resolve(key, geocode_fn, *args)
+
+    def reverse(self, latitude: float, longitude: float) -> Union[dict, None]:
+        result = self.reverse_local(latitude, longitude)
+        if result is not None:
+            return result
+
+        key, geocode_fn, args = self.get_reverse_lookup(latitude, longitude)
+        return self.resolve(key, geocode_fn, *args)
+
+    def resolve_upstream_safe(self, key: str, geocode_fn, *args) -> Union[dict, APIError, None]:
+        try:
+            return self.__single_flight.do(key, self.resolve_upstream, key, geocode_fn, *args)
+        except APIError as e:
+            return e
+
+    def batch(self, lookups: List[tuple]) -> List[Union[dict, APIError, None]]:
+        results = [None] * len(lookups)
+        key_indexes = {}
+        pending = {}
+
+        #
+        # Serve what is available locally or from the cache and resolve each
+        # remaining distinct key once, concurrently, under the rate limit
+        #
+        for index, lookup in enumerate(lookups):
+            lookup_type = lookup[0]
+
+            if lookup_type == GeocodeLookupType.REVERSE:
+                result = self.reverse_local(*lookup[1:])
+                if result is not None:
+                    results[index] = result
+                    continue
+
+                key, geocode_fn, args = self.get_reverse_lookup(*lookup[1:])
+            else:
+                key, geocode_fn, args = self.get_forward_lookup(*lookup[1:])
+
+            if key in key_indexes:
+                key_indexes[key].append(index)
+                continue
+
+            key_indexes[key] = [index]
+
+            result = self.find_cached(key)
+            if result is None:
+                pending[key] = self.__batch_executor.submit(self.resolve_upstream_safe, key, geocode_fn, *args)
+            else:
+                results[index] = result
+
+        for key, indexes in key_indexes.items():
+            if key in pending:
+                result = pending[key].result()
+            else:
+                result = results[indexes[0]]
+
+            for index in indexes:
+                results[index] = result
+
+        return results
+
+    def get_stats(self):
+        cache_stats = self.__cache.get_stats()
+        no_lookups = cache_stats['hits'] + cache_stats['misses']
+        no_hits = cache_stats['hits'] + self.persistent_hits
+
+        if no_lookups:
+            hit_rate = no_hits / no_lookups
+        else:
+            hit_rate = 0
+
+        return {
+            'gazetteer_size': len(self.__gazetteer) if self.__gazetteer is not None else 0,
+            'gazetteer_hits': self.gazetteer_hits,
+            'memory': cache_stats,
+            'persistent_hits': self.persistent_hits,
+            'upstream_calls': self.upstream_calls,
+            'coalesced_calls': self.__single_flight.coalesced,
+            'rate_limiter': self.__rate_limiter.get_stats(),
+            'hit_rate': hit_rate,
+        }
@@ -0,0 +1,46 @@
+from services.GeocodeService import GeocodeService
+from services.NotificationService import NotificationService
+from services.TokenService import TokenService
+from services.UserService import UserService
+from utils.MetricsRegistry import MetricsRegistry
+
+
+class MetricsService:
+    def __init__(self, registry: MetricsRegistry, user_service: UserService, token_service: TokenService,
+                 geocode_service: GeocodeService, notification_service: NotificationService):
+        self.registry = registry
+        self.__stats_sources = {
+            'user_cache': user_service.get_cache_stats,
+            'token_cache': token_service.get_cache_stats,
+            'geocode': geocode_service.get_stats,
+            'notifications': notification_service.get_stats,
+        }
+
+        for name in self.__stats_sources:
+            self.register_stats_gauge(name)
+
+    def register_stats_gauge(self, name: str):
+        self.registry.register_gauge('odomu_{}'.format(name), 'Values reported by {} stats'.format(name))
+
+    def add_stats_source(self, name: str, get_stats):
+        self.__stats_sources[name] = get_stats
+        self.register_stats_gauge(name)
+
+    def collect_stats(self, name: str, stats: dict, prefix: str = ''):
+        for key, value in stats.items():
+            stat = '{}{}'.format(prefix, key)
+
+            if isinstance(value, dict):
+                self.collect_stats(name, value, '{}_'.format(stat))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.registry.set('odomu_{}'.format(name), {'stat': stat}, value)
+
+    def render(self) -> str:
+        #
+        # Service stats are only read when scraped, keep them as gauges
+        # labeled by their key
+        #
+        for name, get_stats in self.__stats_sources.items():
+            self.collect_stats(name, get_stats())
+
+        return self.registry.render()
@@ -1,17 +1,23 @@
 import json
 from enum import Enum
+from time import perf_counter
 from typing import List
 
 from flask import request
-from flask_jwt_extended import decode_token
 from flask_jwt_extended.utils import verify_token_type
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from mongoengine import DoesNotExist
 from pyee import EventEmitter
 
 from models.Area import Area
 from models.User import User
-from utils.errors import JWTHeaderMissing, UserNotLoggedIn
+from services.TokenService import TokenService
+from utils.Debouncer import Debouncer
+from utils.LRUCache import LRUCache
+from utils.MessageBus import MessageBus
+from utils.MetricsRegistry import MetricsRegistry
+from utils.errors import JWTHeaderMissing, UserNotLoggedIn, AreaDoesNotExist
+from utils.json_patch import make_patch
 from utils.token_utils import TokenType, verify_fresh_token, get_token_identity
 
 
@@ -22,74 +28,235 @@ def _find_user_by_username(username: str):
         return None
 
 
-def _verify_access_token(encoded_token: str):
-    try:
-        decoded_token = decode_token(encoded_token)
-        verify_token_type(decoded_token, expected_type=TokenType.ACCESS.value)
-        verify_fresh_token(decoded_token)
-    except Exception as e:
-        raise UserNotLoggedIn(original_message=str(e))
+AREAS_CHANNEL = 'areas'
+
 
-    return decoded_token
+def get_user_room(user_id) -> str:
+    return 'user-{}'.format(user_id)
 
 
 class NotificationServiceEvents(Enum):
     AUTHENTICATE_TRY_LINK = 'authenticate-try-link'
+    AREA_RESYNC = 'area-resync'
 
 
 class SocketEvents(Enum):
     AREA_ADDED = 'area-added'
     AREA_UPDATED = 'area-updated'
     AREA_DELETED = 'area-deleted'
+    AREA_PATCHED = 'area-patched'
+    AREA_RESYNC = 'area-resync'
+    AREA_RESYNC_ERROR = 'area-resync-error'
+    AREAS_BATCH = 'areas-batch'
     AUTHENTICATE_ERROR = 'authenticate-error'
     AUTHENTICATE = 'authenticate'
     AUTHENTICATED = 'authenticated'
 
 
 class NotificationService:
-    def __init__(self, socket_server: SocketIO, debug: bool = False):
+    def __init__(self, socket_server: SocketIO, message_bus: MessageBus, area_snapshots: LRUCache,
+                 metrics: MetricsRegistry, token_service: TokenService, update_coalesce_window: float = 0,
+                 debug: bool = False):
         self.socket_server = socket_server
+        self.message_bus = message_bus
+        self.area_snapshots = area_snapshots
+        self.metrics = metrics
+        self.token_service = token_service
+        self.update_coalesce_window = update_coalesce_window
+        self.update_debouncer = Debouncer(update_coalesce_window, self.notify_area_update_now)
         self.debug = debug
         self.emitter = EventEmitter()
         self.attach_listeners()
         self.sid_to_users_map: dict[str, User] = {}
-        self.username_to_sid_map: dict[str, list] = {}
+        self.user_id_to_sids_map: dict[str, list] = {}
+
+        self.message_bus.subscribe(AREAS_CHANNEL, self.deliver_area_change)
+
+        self.metrics.register_counter('socketio_events_received_total', 'Socket.IO events received from clients')
+        self.metrics.register_counter('socketio_events_emitted_total', 'Socket.IO events emitted to a sid or room')
+        self.metrics.register_histogram('socketio_emit_duration_seconds', 'Socket.IO emit duration')
+
+    def record_emit(self, name: str, start: float):
+        labels = {'event': name}
+        self.metrics.inc('socketio_events_emitted_total', labels)
+        self.metrics.observe('socketio_emit_duration_seconds', labels, perf_counter() - start)
+
+    def record_received(self, name: str):
+        self.metrics.inc('socketio_events_received_total', {'event': name})
 
     def emit_to_sid(self, sid: str, name: str, *args):
+        start = perf_counter()
         emit(name, *args, room=sid, namespace='/')
+        self.record_emit(name, start)
+
+    def emit_to_room(self, room: str, name: str, *args):
+        start = perf_counter()
+        self.socket_server.emit(name, *args, room=room, namespace='/')
+        self.record_emit(name, start)
 
     def link_user_sid(self, sid: str, user: User):
         self.sid_to_users_map[sid] = user
-        self.username_to_sid_map.setdefault(user.username, []).append(sid)
+        self.user_id_to_sids_map.setdefault(str(user.id), []).append(sid)
+        join_room(get_user_room(user.id), sid=sid, namespace='/')
 
     def unlink_user_sid(self, sid: str, user: User):
         del self.sid_to_users_map[sid]
-        self.username_to_sid_map[user.username].remove(sid)
+        self.user_id_to_sids_map[str(user.id)].remove(sid)
 
     def get_linked_user(self, sid: str):
         return self.sid_to_users_map.get(sid)
 
-    def get_linked_sids(self, user: User) -> List[str]:
-        return self.username_to_sid_map.get(user.username)
+    def get_linked_sids(self, user_id) -> List[str]:
+        return self.user_id_to_sids_map.get(str(user_id))
+
+    def publish_area_change(self, name: str, area: Area, d: dict):
+        #
+        # Serialize once and let every worker deliver the same payload to the
+        # owner's sockets it has linked
+        #
+        self.message_bus.publish(AREAS_CHANNEL, {
+            'name': name,
+            'owner_id': str(area.owner_id),
+            'area': d,
+        })
 
     def notify_area_change(self, name: str, area: Area):
-        sids = self.get_linked_sids(area.owner)
-        if not sids:
+        self.publish_area_change(name, area, area.to_dict())
+
+    def deliver_area_change(self, message: dict):
+        owner_id = message['owner_id']
+        if not self.get_linked_sids(owner_id):
             return
 
+        self.emit_to_room(get_user_room(owner_id), message['name'], message['area'])
+
+    def notify_area_update_now(self, area: Area):
+        area_id = str(area.id)
         d = area.to_dict()
-        for sid in sids:
-            self.emit_to_sid(sid, name, d)
+
+        previous = self.area_snapshots.get(area_id)
+        self.area_snapshots.set(area_id, d)
+
+        if previous is None:
+            self.publish_area_change(SocketEvents.AREA_UPDATED.value, area, d)
+            return
+
+        #
+        # Clients apply the patch only if they are at the base version, and
+        # ask for a full snapshot otherwise
+        #
+        self.publish_area_change(SocketEvents.AREA_PATCHED.value, area, {
+            'id': area_id,
+            'version': d['version'],
+            'base_version': previous['version'],
+            'patch': make_patch(previous, d),
+        })
 
     def notify_area_add(self, area: Area):
-        self.notify_area_change(SocketEvents.AREA_ADDED.value, area)
+        d = area.to_dict()
+        self.area_snapshots.set(str(area.id), d)
+        self.publish_area_change(SocketEvents.AREA_ADDED.value, area, d)
 
     def notify_area_update(self, area: Area):
-        self.notify_area_change(SocketEvents.AREA_UPDATED.value, area)
+        if not self.update_coalesce_window:
+            self.notify_area_update_now(area)
+            return
+
+        #
+        # Only the latest state of an area updated repeatedly within the
+        # window is sent
+        #
+        self.update_debouncer.submit(str(area.id), area)
 
     def notify_area_delete(self, area: Area):
+        self.update_debouncer.cancel(str(area.id))
+        self.area_snapshots.pop(str(area.id))
         self.notify_area_change(SocketEvents.AREA_DELETED.value, area)
 
+    def notify_areas_batch(self, operation: str, owner: User, areas: List[Area]):
+        items = []
+        for area in areas:
+            area_id = str(area.id)
+            self.update_debouncer.cancel(area_id)
+
+            d = area.to_dict(owner=owner)
+            if operation == 'delete':
+                self.area_snapshots.pop(area_id)
+            else:
+                self.area_snapshots.set(area_id, d)
+
+            items.append(d)
+
+        for chunk in self.split_batch_items(owner, operation, items):
+            self.message_bus.publish(AREAS_CHANNEL, self.make_batch_message(owner, operation, chunk))
+
+    def make_batch_message(self, owner: User, operation: str, items: List[dict]) -> dict:
+        return {
+            'name': SocketEvents.AREAS_BATCH.value,
+            'owner_id': str(owner.id),
+            'area': {
+                'operation': operation,
+                'items': items,
+            },
+        }
+
+    def split_batch_items(self, owner: User, operation: str, items: List[dict]) -> List[List[dict]]:
+        max_size = self.message_bus.max_message_size
+        if max_size is None:
+            return [items]
+
+        #
+        # A large batch does not fit in a single bus message, send it as
+        # several areas-batch events. Items are separated by two bytes in
+        # the encoded list
+        #
+        base_size = len(self.message_bus.encode(AREAS_CHANNEL, self.make_batch_message(owner, operation, [])))
+
+        chunks = []
+        chunk = []
+        size = base_size
+        for item in items:
+            item_size = len(json.dumps(item).encode('utf-8')) + 2
+            if chunk and size + item_size > max_size:
+                chunks.append(chunk)
+                chunk = []
+                size = base_size
+
+            chunk.append(item)
+            size += item_size
+
+        chunks.append(chunk)
+
+        return chunks
+
+    def notify_areas_add(self, owner: User, areas: List[Area]):
+        self.notify_areas_batch('add', owner, areas)
+
+    def notify_areas_update(self, owner: User, areas: List[Area]):
+        self.notify_areas_batch('update', owner, areas)
+
+    def notify_areas_delete(self, owner: User, areas: List[Area]):
+        self.notify_areas_batch('delete', owner, areas)
+
+    def send_area_snapshot(self, sid: str, area: Area, owner: User):
+        self.emit_to_sid(sid, SocketEvents.AREA_UPDATED.value, area.to_dict(owner=owner))
+
+    def notify_area_resync_error(self, sid: str, area_id: str):
+        e = AreaDoesNotExist()
+        d = e.to_dict()
+        d['id'] = area_id
+        self.emit_to_sid(sid, SocketEvents.AREA_RESYNC_ERROR.value, d)
+
+    def get_stats(self):
+        return {
+            'linked_sockets': len(self.sid_to_users_map),
+            'update_coalescing': self.update_debouncer.get_stats(),
+            'area_snapshots': self.area_snapshots.get_stats(),
+        }
+
+    def close(self):
+        self.update_debouncer.flush_all()
+
     def authenticate_link_notify(self, sid: str, user: User):
         self.link_user_sid(sid, user)
         if self.debug:
@@ -101,19 +268,33 @@ class NotificationService:
         if self.debug:
             print('Client with sid {} authenticate error'.format(sid))
 
+    def verify_access_token(self, encoded_token: str):
+        try:
+            decoded_token = self.token_service.decode(encoded_token)
+            verify_token_type(decoded_token, expected_type=TokenType.ACCESS.value)
+            verify_fresh_token(decoded_token)
+        except Exception as e:
+            raise UserNotLoggedIn(original_message=str(e))
+
+        return decoded_token
+
     def attach_listeners(self):
         @self.socket_server.event
         def connect():
+            self.record_received('connect')
+
             if self.debug:
                 print('Client with id {} connected'.format(request.sid))
 
         @self.socket_server.on(SocketEvents.AUTHENTICATE.value)
         def on_authenticate(encoded_token):
+            self.record_received(SocketEvents.AUTHENTICATE.value)
+
             if not encoded_token:
                 return emit(SocketEvents.AUTHENTICATE_ERROR.value, JWTHeaderMissing().to_dict())
 
             try:
-                decoded_token = _verify_access_token(encoded_token)
+                decoded_token = self.verify_access_token(encoded_token)
             except UserNotLoggedIn as e:
                 return emit(SocketEvents.AUTHENTICATE_ERROR.value, e.to_dict())
 
@@ -124,8 +305,20 @@ class NotificationService:
 
             self.emitter.emit(NotificationServiceEvents.AUTHENTICATE_TRY_LINK, request.sid, username)
 
+        @self.socket_server.on(SocketEvents.AREA_RESYNC.value)
+        def on_area_resync(area_id):
+            self.record_received(SocketEvents.AREA_RESYNC.value)
+
+            user = self.get_linked_user(request.sid)
+            if not user:
+                return emit(SocketEvents.AUTHENTICATE_ERROR.value, UserNotLoggedIn().to_dict())
+
+            self.emitter.emit(NotificationServiceEvents.AREA_RESYNC, request.sid, user, area_id)
+
         @self.socket_server.event
         def disconnect():
+            self.record_received('disconnect')
+
             user = self.get_linked_user(request.sid)
             if not user:
                 return
@@ -0,0 +1,54 @@
+from hashlib import sha256
+
+from flask_jwt_extended import create_access_token, decode_token
+
+from utils.LRUCache import LRUCache
+from utils.token_utils import get_token_ttl
+
+
+class TokenService:
+    def __init__(self, decoded_tokens_cache: LRUCache, fresh_access_tokens_cache: LRUCache,
+                 fresh_access_token_reuse_margin: float):
+        self.__decoded_tokens_cache = decoded_tokens_cache
+        self.__fresh_access_tokens_cache = fresh_access_tokens_cache
+        self.__fresh_access_token_reuse_margin = fresh_access_token_reuse_margin
+
+    def decode(self, encoded_token: str) -> dict:
+        key = sha256(encoded_token.encode('utf-8')).digest()
+
+        decoded_token = self.__decoded_tokens_cache.get(key)
+        if decoded_token is not None:
+            return decoded_token
+
+        decoded_token = decode_token(encoded_token)
+
+        ttl = get_token_ttl(decoded_token)
+        if ttl is None or ttl > 0:
+            self.__decoded_tokens_cache.set(key, decoded_token, ttl)
+
+        return decoded_token
+
+    def get_fresh_access_token(self, username: str) -> str:
+        access_token = self.__fresh_access_tokens_cache.get(username)
+        if access_token is not None:
+            return access_token
+
+        access_token = create_access_token(identity=username, fresh=True)
+
+        #
+        # Hand out the same token until it is close to expiring instead of
+        # signing a new one on every request made with a stale access token
+        #
+        ttl = get_token_ttl(self.decode(access_token))
+        if ttl is None:
+            self.__fresh_access_tokens_cache.set(username, access_token)
+        elif ttl > self.__fresh_access_token_reuse_margin:
+            self.__fresh_access_tokens_cache.set(username, access_token, ttl - self.__fresh_access_token_reuse_margin)
+
+        return access_token
+
+    def get_cache_stats(self):
+        return {
+            'decoded': self.__decoded_tokens_cache.get_stats(),
+            'fresh_access': self.__fresh_access_tokens_cache.get_stats(),
+        }
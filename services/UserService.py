@@ -3,6 +3,8 @@ from typing import Union
 from mongoengine import DoesNotExist, NotUniqueError
 
 from models.User import User
+from utils.BlockingExecutor import BlockingExecutor
+from utils.LRUCache import LRUCache
 
 from utils.errors import UserAlreadyExists, UserLoginFailed, UserAddFailed, UserUsernameInvalid, UserPasswordInvalid, \
     UserFirstNameInvalid, UserLastNameInvalid
@@ -10,8 +12,12 @@ from validators.UserValidator import UserValidator
 
 
 class UserService:
-    def __init__(self, validator: UserValidator):
+    def __init__(self, validator: UserValidator, cache: LRUCache, password_executor: BlockingExecutor,
+                 password_rounds: int):
         self.__validator = validator
+        self.__cache = cache
+        self.__password_executor = password_executor
+        self.__password_rounds = password_rounds
 
     def add(self, username: str, password: str, first_name: str, last_name: str) -> User:
         me = UserAddFailed()
@@ -37,17 +43,19 @@ class UserService:
             me.add_error(e)
 
         user = User(username=username, first_name=first_name, last_name=last_name)
-        user.set_password(password)
+        self.__password_executor.run(user.set_password, password, self.__password_rounds)
 
         try:
             user.save()
         except NotUniqueError:
             raise UserAlreadyExists()
 
+        self.invalidate_cached(username)
+
         return user
 
     def verify_password(self, user: User, password: str):
-        if not user.is_correct_password(password):
+        if not self.__password_executor.run(user.is_correct_password, password):
             raise UserLoginFailed()
 
     def find_one_by(self, *args, **kwargs) -> Union[User, None]:
@@ -55,3 +63,20 @@ class UserService:
             return User.objects.get(*args, **kwargs)
         except DoesNotExist:
             return None
+
+    def find_one_by_username(self, username: str) -> Union[User, None]:
+        user = self.__cache.get(username)
+        if user is not None:
+            return user
+
+        user = self.find_one_by(username=username)
+        if user is not None:
+            self.__cache.set(username, user)
+
+        return user
+
+    def invalidate_cached(self, username: str):
+        self.__cache.pop(username)
+
+    def get_cache_stats(self):
+        return self.__cache.get_stats()
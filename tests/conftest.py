@@ -0,0 +1,30 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+#
+# Fall back to the example config when no local one exists, and never talk to
+# a real database or write slow query logs from the tests
+#
+try:
+    import config
+except ImportError:
+    spec = importlib.util.spec_from_file_location('config', os.path.join(ROOT, 'config.example.py'))
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    sys.modules['config'] = config
+
+config.DB_MOCK = True
+config.SLOW_QUERY_THRESHOLD = None
+
+
+@pytest.fixture(scope='session')
+def database():
+    from database import connect_database_from_config
+
+    connect_database_from_config()
@@ -0,0 +1,226 @@
+import base64
+import io
+import time
+
+import pytest
+from bson import ObjectId
+from PIL import Image
+from pyee import BaseEventEmitter
+
+from models.Area import Area
+from models.User import User
+from services.AreaService import AreaService, AreaServiceEvents
+from utils.errors import AreaBatchFailed
+from validators.AreaValidator import AreaValidator
+
+
+def make_image() -> str:
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), (255, 0, 0)).save(buffer, 'PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def make_item(i: int, **kwargs) -> dict:
+    item = {
+        'name': 'Area {}'.format(i),
+        'category': 0,
+        'location': 'Location {}'.format(i),
+        'location_point': [23.59, 46.77],
+    }
+    item.update(kwargs)
+    return item
+
+
+def make_update(area: Area, **kwargs) -> dict:
+    item = {
+        'id': str(area.id),
+        'updated_at_timestamp': area.updated_at_timestamp,
+    }
+    item.update(kwargs)
+    return item
+
+
+def count_image_files() -> int:
+    return Area._get_db()['images.files'].count_documents({})
+
+
+def get_error_codes(e: AreaBatchFailed) -> dict:
+    return {index: error.code for index, error in zip(e.indices, e.errors)}
+
+
+class Recorder:
+    def __init__(self, emitter: BaseEventEmitter):
+        self.events = []
+
+        for event in (AreaServiceEvents.AREAS_ADDED, AreaServiceEvents.AREAS_UPDATED,
+                      AreaServiceEvents.AREAS_DELETED):
+            emitter.on(event, lambda owner, areas, event=event: self.events.append((event, areas)))
+
+
+@pytest.fixture
+def owner(database):
+    Area.drop_collection()
+    Area._get_db()['images.files'].delete_many({})
+    Area._get_db()['images.chunks'].delete_many({})
+    User.drop_collection()
+
+    return User(username='owner', password=b'password', first_name='First', last_name='Last').save()
+
+
+@pytest.fixture
+def area_service():
+    return AreaService(AreaValidator(), BaseEventEmitter(), bulk_writes=False)
+
+
+@pytest.fixture
+def recorder(area_service):
+    return Recorder(area_service.emitter)
+
+
+def test_add_many(owner, area_service, recorder):
+    areas = area_service.add_many(owner, [make_item(0), make_item(1, image=make_image())])
+
+    assert Area.objects(owner=owner).count() == 2
+    assert all(area.version == 1 for area in Area.objects(owner=owner))
+    assert count_image_files() == 1
+    assert recorder.events == [(AreaServiceEvents.AREAS_ADDED, areas)]
+
+
+def test_add_many_rejected_batch_writes_no_images(owner, area_service, recorder):
+    items = [
+        make_item(0, image=make_image()),
+        make_item(1, name='', image=make_image()),
+        make_item(2, image='not an image'),
+    ]
+
+    with pytest.raises(AreaBatchFailed) as e:
+        area_service.add_many(owner, items)
+
+    assert e.value.indices == [1, 2]
+    assert Area.objects(owner=owner).count() == 0
+    assert count_image_files() == 0
+    assert recorder.events == []
+
+
+def test_update_many(owner, area_service, recorder):
+    added = area_service.add_many(owner, [make_item(0, image=make_image()), make_item(1)])
+    previous_image_id = added[0].image.grid_id
+
+    areas = area_service.update_many(owner, [
+        make_update(added[0], name='Renamed', image=make_image()),
+        make_update(added[1], location='Elsewhere'),
+    ])
+
+    stored = {area.id: area for area in Area.objects(owner=owner)}
+    assert stored[added[0].id].name == 'Renamed'
+    assert stored[added[0].id].image.grid_id != previous_image_id
+    assert stored[added[1].id].location == 'Elsewhere'
+    assert all(area.version == 2 for area in stored.values())
+    assert Area._get_db()['images.files'].find_one({'_id': previous_image_id}) is None
+    assert count_image_files() == 1
+    assert recorder.events[-1] == (AreaServiceEvents.AREAS_UPDATED, areas)
+
+
+def test_update_many_rejected_batch_keeps_previous_images(owner, area_service, recorder):
+    added = area_service.add_many(owner, [make_item(0, image=make_image()), make_item(1)])
+    previous_image_id = added[0].image.grid_id
+
+    with pytest.raises(AreaBatchFailed) as e:
+        area_service.update_many(owner, [
+            make_update(added[0], image=make_image()),
+            make_update(added[1], name=''),
+        ])
+
+    assert e.value.indices == [1]
+    assert [area.image.grid_id for area in Area.objects(id=added[0].id)] == [previous_image_id]
+    assert count_image_files() == 1
+    assert all(area.version == 1 for area in Area.objects(owner=owner))
+    assert [event for event, _ in recorder.events] == [AreaServiceEvents.AREAS_ADDED]
+
+
+def test_update_many_reports_concurrent_updates(owner, area_service, recorder, monkeypatch):
+    added = area_service.add_many(owner, [make_item(0), make_item(1, image=make_image()), make_item(2)])
+    previous_image_id = added[1].image.grid_id
+    find_many_by_ids = area_service.find_many_by_ids
+
+    #
+    # Bump the middle area after the batch read it, as another writer would
+    #
+    def find_many_by_ids_then_update(*args):
+        areas = find_many_by_ids(*args)
+        Area.objects(id=added[1].id).update(inc__version=1, set__name='Concurrent')
+        return areas
+
+    monkeypatch.setattr(area_service, 'find_many_by_ids', find_many_by_ids_then_update)
+
+    with pytest.raises(AreaBatchFailed) as e:
+        area_service.update_many(owner, [make_update(area, name='Batch', image=make_image()) for area in added])
+
+    assert get_error_codes(e.value) == {1: 'area-update-conflict'}
+
+    stored = {area.id: area for area in Area.objects(owner=owner)}
+    assert [stored[area.id].name for area in added] == ['Batch', 'Concurrent', 'Batch']
+    assert stored[added[1].id].image.grid_id == previous_image_id
+    assert count_image_files() == 3
+
+    event, areas = recorder.events[-1]
+    assert event == AreaServiceEvents.AREAS_UPDATED
+    assert [area.id for area in areas] == [added[0].id, added[2].id]
+
+
+def test_find_conflicted(owner, area_service):
+    area_service.add_many(owner, [make_item(0), make_item(1)])
+    areas = list(Area.objects(owner=owner).order_by('id'))
+
+    Area.objects(id=areas[1].id).update(inc__version=1)
+
+    assert area_service.find_conflicted(areas, areas[0].updated_at) == [areas[1]]
+
+
+def test_delete_many(owner, area_service, recorder):
+    added = area_service.add_many(owner, [make_item(0, image=make_image()), make_item(1), make_item(2)])
+
+    areas = area_service.delete_many(owner, [str(added[0].id), str(added[1].id)])
+
+    assert [area.id for area in Area.objects(owner=owner)] == [added[2].id]
+    assert count_image_files() == 0
+    assert recorder.events[-1] == (AreaServiceEvents.AREAS_DELETED, areas)
+
+
+def test_delete_many_reports_duplicate_and_missing_ids(owner, area_service, recorder):
+    added = area_service.add_many(owner, [make_item(0)])
+    area_id = str(added[0].id)
+
+    with pytest.raises(AreaBatchFailed) as e:
+        area_service.delete_many(owner, [area_id, area_id, str(ObjectId()), 'not-an-id'])
+
+    assert get_error_codes(e.value) == {
+        1: 'area-batch-item-duplicate',
+        2: 'area-not-exist',
+        3: 'area-not-exist',
+    }
+    assert Area.objects(owner=owner).count() == 1
+    assert [event for event, _ in recorder.events] == [AreaServiceEvents.AREAS_ADDED]
+
+
+def test_revision_changes_with_every_write(owner, area_service):
+    revisions = [area_service.get_revision(owner)]
+    assert revisions[0][0] == 0
+
+    added = area_service.add_many(owner, [make_item(0), make_item(1)])
+    revisions.append(area_service.get_revision(owner))
+
+    #
+    # Stored dates have millisecond precision, make sure the update lands in a
+    # later one
+    #
+    time.sleep(0.002)
+    area_service.update_many(owner, [make_update(added[0], name='Renamed')])
+    revisions.append(area_service.get_revision(owner))
+
+    area_service.delete_many(owner, [str(added[1].id)])
+    revisions.append(area_service.get_revision(owner))
+
+    assert len(set(revisions)) == len(revisions)
+    assert [no_areas for no_areas, _ in revisions] == [0, 2, 2, 1]
+    assert area_service.get_revision(owner) == revisions[-1]
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from flask import Flask, jsonify
+
+from api.conditional import make_etag, get_query_etag_parts, get_conditional_response
+
+app = Flask(__name__)
+
+LAST_MODIFIED = datetime(2021, 5, 4, 12, 30, 15)
+
+
+class ResponseMaker:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return jsonify({'items': []})
+
+
+def get_response(etag: str, headers: dict = None, **kwargs):
+    make_response = ResponseMaker()
+    with app.test_request_context('/', headers=headers):
+        response = get_conditional_response(etag, make_response, **kwargs)
+
+    return response, make_response.calls
+
+
+def test_etags_depend_on_every_part():
+    assert make_etag('areas', 1, 'a') == make_etag('areas', 1, 'a')
+    assert make_etag('areas', 1, 'a') != make_etag('areas', 2, 'a')
+
+
+def test_query_etag_parts_ignore_argument_order():
+    with app.test_request_context('/?limit=2&page=1'):
+        first = get_query_etag_parts()
+
+    with app.test_request_context('/?page=1&limit=2'):
+        second = get_query_etag_parts()
+
+    assert first == second
+
+
+def test_response_is_built_without_validators():
+    etag = make_etag('areas')
+    response, calls = get_response(etag, last_modified=LAST_MODIFIED)
+
+    assert response.status_code == 200
+    assert calls == 1
+    assert response.get_etag() == (etag, False)
+    assert response.last_modified.timestamp() == int(LAST_MODIFIED.timestamp())
+    assert response.cache_control.no_cache
+    assert response.cache_control.private
+    assert not response.cache_control.public
+
+
+def test_public_responses():
+    response, _ = get_response(make_etag('areas'), public=True)
+
+    assert response.cache_control.public
+    assert not response.cache_control.private
+
+
+def test_matching_etag_is_not_modified():
+    etag = make_etag('areas')
+    response, calls = get_response(etag, {'If-None-Match': '"{}"'.format(etag)}, last_modified=LAST_MODIFIED)
+
+    assert response.status_code == 304
+    assert calls == 0
+    assert response.get_data() == b''
+    assert response.get_etag() == (etag, False)
+    assert response.last_modified is not None
+
+
+def test_weak_and_listed_etags_match():
+    etag = make_etag('areas')
+
+    response, calls = get_response(etag, {'If-None-Match': 'W/"{}"'.format(etag)})
+    assert (response.status_code, calls) == (304, 0)
+
+    response, calls = get_response(etag, {'If-None-Match': '"other", "{}"'.format(etag)})
+    assert (response.status_code, calls) == (304, 0)
+
+    response, calls = get_response(etag, {'If-None-Match': '*'})
+    assert (response.status_code, calls) == (304, 0)
+
+
+def test_stale_etag_gets_a_full_response():
+    response, calls = get_response(make_etag('areas', 2), {'If-None-Match': '"{}"'.format(make_etag('areas', 1))})
+
+    assert response.status_code == 200
+    assert calls == 1
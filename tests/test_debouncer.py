@@ -0,0 +1,95 @@
+import time
+from threading import Event
+
+from utils.Debouncer import Debouncer
+
+WINDOW = 0.05
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.called = Event()
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        self.called.set()
+
+
+def test_submits_are_coalesced_to_the_latest_args():
+    recorder = Recorder()
+    debouncer = Debouncer(WINDOW, recorder)
+
+    debouncer.submit('a', 1)
+    debouncer.submit('a', 2)
+    debouncer.submit('a', 3)
+    assert recorder.calls == []
+
+    assert recorder.called.wait(1)
+    time.sleep(WINDOW * 2)
+
+    assert recorder.calls == [(3,)]
+    assert debouncer.get_stats() == {'pending': 0, 'submitted': 3, 'flushed': 1, 'cancelled': 0, 'saved': 2}
+
+
+def test_keys_are_flushed_separately():
+    recorder = Recorder()
+    debouncer = Debouncer(60, recorder)
+
+    debouncer.submit('a', 1)
+    debouncer.submit('b', 2)
+    debouncer.flush('a')
+
+    assert recorder.calls == [(1,)]
+    assert debouncer.get_stats()['pending'] == 1
+
+    debouncer.flush_all()
+
+    assert recorder.calls == [(1,), (2,)]
+    assert debouncer.get_stats()['pending'] == 0
+
+
+def test_cancel():
+    recorder = Recorder()
+    debouncer = Debouncer(WINDOW, recorder)
+
+    debouncer.submit('a', 1)
+
+    assert debouncer.cancel('a') is True
+    assert debouncer.cancel('a') is False
+    assert debouncer.cancel('b') is False
+
+    time.sleep(WINDOW * 2)
+
+    assert recorder.calls == []
+    assert debouncer.get_stats() == {'pending': 0, 'submitted': 1, 'flushed': 0, 'cancelled': 1, 'saved': 1}
+
+
+def test_failing_fn_does_not_stop_later_flushes():
+    calls = []
+
+    def fn(value):
+        calls.append(value)
+        if value == 1:
+            raise ValueError(value)
+
+    debouncer = Debouncer(60, fn)
+
+    debouncer.submit('a', 1)
+    debouncer.flush('a')
+    debouncer.submit('a', 2)
+    debouncer.flush('a')
+
+    assert calls == [1, 2]
+    assert debouncer.get_stats()['flushed'] == 2
+
+
+def test_flush_without_pending_does_nothing():
+    recorder = Recorder()
+    debouncer = Debouncer(60, recorder)
+
+    debouncer.flush('a')
+    debouncer.flush_all()
+
+    assert recorder.calls == []
+    assert debouncer.get_stats()['flushed'] == 0
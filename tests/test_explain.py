@@ -0,0 +1,48 @@
+import time
+
+from utils.SlowQueryLogger import SlowQueryLogger
+from utils.explain import get_winning_plan, get_winning_stages
+
+FETCH_PLAN = {
+    'stage': 'FETCH',
+    'inputStage': {
+        'stage': 'IXSCAN',
+        'indexName': 'owner_1__id_-1',
+    },
+}
+
+
+def test_find_explain():
+    assert get_winning_plan({'queryPlanner': {'winningPlan': FETCH_PLAN}}) == FETCH_PLAN
+
+
+def test_slot_based_explain():
+    explain = {'queryPlanner': {'winningPlan': {'queryPlan': FETCH_PLAN, 'slotBasedPlan': {}}}}
+    assert get_winning_plan(explain) == FETCH_PLAN
+
+
+def test_aggregate_explain():
+    explain = {
+        'stages': [
+            {'$cursor': {'queryPlanner': {'winningPlan': FETCH_PLAN}}},
+            {'$group': {'_id': '$owner'}},
+        ],
+    }
+
+    assert get_winning_stages(get_winning_plan(explain)) == ['FETCH', 'IXSCAN']
+
+
+def test_failed_explains_do_not_stop_the_thread(database, tmp_path):
+    slow_query_logger = SlowQueryLogger(str(tmp_path / 'slow.log'), 0, 1)
+
+    #
+    # mongomock does not implement explain, every one of them fails
+    #
+    for _ in range(3):
+        slow_query_logger.queue_explain({'command': 'find', 'collection': 'area', 'endpoint': None}, {'find': 'area'})
+
+    deadline = time.monotonic() + 5
+    while slow_query_logger.get_stats()['explains_failed'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert slow_query_logger.get_stats()['explains_failed'] == 3
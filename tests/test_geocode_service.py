@@ -0,0 +1,144 @@
+import pytest
+from flask import Flask
+from flask_injector import FlaskInjector
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
+from injector import Injector, singleton
+
+from config import GEOCODE_CACHE_TTL, ACCESS_TOKEN_HEADER_NAMES, REFRESH_TOKEN_HEADER_NAMES
+from models.GeocodeResult import GeocodeResult
+from models.User import User
+from services.GeocodeService import GeocodeService
+from utils.LRUCache import LRUCache
+from utils.RateLimiter import RateLimiter
+
+
+class StubLocation:
+    def __init__(self, raw: dict):
+        self.raw = raw
+
+
+class StubGeocoder:
+    def __init__(self):
+        self.forward_calls = []
+        self.reverse_calls = []
+
+    def geocode(self, address):
+        self.forward_calls.append(address)
+        if address == 'nowhere':
+            return None
+
+        return StubLocation({'display_name': address.title(), 'lat': '46.77', 'lon': '23.59'})
+
+    def reverse(self, point):
+        self.reverse_calls.append(point)
+        return StubLocation({'display_name': 'Near {:.4f},{:.4f}'.format(*point)})
+
+
+def make_service(geocoder, cache_size: int = 16) -> GeocodeService:
+    return GeocodeService(geocoder, LRUCache(cache_size), RateLimiter(1000, 1000, 0, 0), 4)
+
+
+@pytest.fixture
+def geocoder(database):
+    GeocodeResult.drop_collection()
+    User.drop_collection()
+
+    return StubGeocoder()
+
+
+def test_forward_key_ignores_case_and_whitespace(geocoder):
+    service = make_service(geocoder)
+
+    assert service.get_forward_key('  Strada   Memorandumului 28 ') == 'forward:strada memorandumului 28'
+
+    first = service.forward('Strada Memorandumului 28')
+    second = service.forward(' strada  MEMORANDUMULUI 28')
+
+    assert first == second
+    assert len(geocoder.forward_calls) == 1
+
+
+def test_reverse_key_is_quantized(geocoder):
+    service = make_service(geocoder)
+
+    assert service.get_reverse_key(*service.quantize_coordinates(46.770012, 23.590049)) == 'reverse:46.7700,23.5900'
+
+    service.reverse(46.770012, 23.590049)
+    service.reverse(46.77004, 23.59)
+
+    assert geocoder.reverse_calls == [(46.77, 23.59)]
+
+
+def test_results_are_persisted(geocoder):
+    service = make_service(geocoder)
+    result = service.forward('Cluj-Napoca')
+
+    document = GeocodeResult.objects(key='forward:cluj-napoca').first()
+    assert document is not None
+    assert document.result == result
+
+    #
+    # A service with an empty memory cache, like another worker or a restart,
+    # is served from the collection
+    #
+    other_service = make_service(geocoder)
+    assert other_service.forward('cluj-napoca') == result
+    assert len(geocoder.forward_calls) == 1
+    assert other_service.get_stats()['persistent_hits'] == 1
+
+
+def test_misses_are_not_persisted(geocoder):
+    service = make_service(geocoder)
+
+    assert service.forward('nowhere') is None
+    assert service.forward('nowhere') is None
+
+    assert GeocodeResult.objects.count() == 0
+    assert len(geocoder.forward_calls) == 2
+
+
+def test_result_collection_expires(database):
+    GeocodeResult.ensure_indexes()
+
+    indexes = GeocodeResult._get_collection().index_information().values()
+    assert any(index.get('key') == [('created_at', 1)] and index.get('expireAfterSeconds') == GEOCODE_CACHE_TTL
+               for index in indexes)
+
+
+def test_stats_endpoint_reports_counters(geocoder):
+    from api.geocode import register_blueprint
+
+    service = make_service(geocoder)
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test'
+    JWTManager(app)
+    register_blueprint(app, '/api/geocode')
+
+    def configure(binder):
+        binder.bind(GeocodeService, to=service, scope=singleton)
+
+    FlaskInjector(app=app, injector=Injector([configure]))
+
+    user = User(username='geocode', first_name='Geocode', last_name='User')
+    user.set_password('password', 4)
+    user.save()
+
+    with app.app_context():
+        headers = {
+            ACCESS_TOKEN_HEADER_NAMES[0]: create_access_token(identity=user.username, fresh=True),
+            REFRESH_TOKEN_HEADER_NAMES[0]: create_refresh_token(identity=user.username),
+        }
+
+    client = app.test_client()
+    for address in ['Cluj-Napoca', 'cluj-napoca', 'Turda']:
+        assert client.get('/api/geocode/forward', query_string={'address': address}, headers=headers).status_code \
+            == 200
+
+    stats = client.get('/api/geocode/stats', headers=headers).json
+
+    assert stats['memory']['hits'] == 1
+    assert stats['memory']['misses'] == 2
+    assert stats['persistent_hits'] == 0
+    assert stats['upstream_calls'] == 2
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
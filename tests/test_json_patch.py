@@ -0,0 +1,67 @@
+import copy
+
+from utils.json_patch import escape_pointer_token, make_patch
+
+
+def apply_patch(document: dict, patch: list) -> dict:
+    document = copy.deepcopy(document)
+
+    for operation in patch:
+        tokens = [token.replace('~1', '/').replace('~0', '~') for token in operation['path'].split('/')[1:]]
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[token]
+
+        if operation['op'] == 'remove':
+            del parent[tokens[-1]]
+        else:
+            parent[tokens[-1]] = operation['value']
+
+    return document
+
+
+def test_equal_documents_have_an_empty_patch():
+    document = {'name': 'Area', 'location': {'point': [1, 2]}}
+
+    assert make_patch(document, copy.deepcopy(document)) == []
+
+
+def test_add_remove_and_replace():
+    old = {'name': 'Area', 'category': 0, 'image': 'a'}
+    new = {'name': 'Renamed', 'category': 0, 'location': 'Somewhere'}
+
+    assert make_patch(old, new) == [
+        {'op': 'remove', 'path': '/image'},
+        {'op': 'replace', 'path': '/name', 'value': 'Renamed'},
+        {'op': 'add', 'path': '/location', 'value': 'Somewhere'},
+    ]
+
+
+def test_nested_dicts_are_diffed_in_place():
+    old = {'owner': {'username': 'a', 'first_name': 'A'}, 'location_point': [1, 2]}
+    new = {'owner': {'username': 'a', 'first_name': 'B'}, 'location_point': [1, 3]}
+
+    assert make_patch(old, new) == [
+        {'op': 'replace', 'path': '/owner/first_name', 'value': 'B'},
+        {'op': 'replace', 'path': '/location_point', 'value': [1, 3]},
+    ]
+
+
+def test_values_changing_type_are_replaced():
+    assert make_patch({'a': {'b': 1}}, {'a': 1}) == [{'op': 'replace', 'path': '/a', 'value': 1}]
+    assert make_patch({'a': 1}, {'a': {'b': 1}}) == [{'op': 'replace', 'path': '/a', 'value': {'b': 1}}]
+
+
+def test_pointer_tokens_are_escaped():
+    assert escape_pointer_token('a/b~c') == 'a~1b~0c'
+    assert make_patch({}, {'a/b': 1, '~': 2}) == [
+        {'op': 'add', 'path': '/a~1b', 'value': 1},
+        {'op': 'add', 'path': '/~0', 'value': 2},
+    ]
+
+
+def test_patch_turns_old_into_new():
+    old = {'name': 'Area', 'a/b': {'c~d': 1, 'e': 2}, 'removed': True}
+    new = {'name': 'Area', 'a/b': {'c~d': 3, 'f': 4}, 'added': None}
+
+    assert apply_patch(old, make_patch(old, new)) == new
@@ -0,0 +1,140 @@
+import json
+import os
+import socket
+import time
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from flask_socketio import SocketIO
+
+from models.Area import Area
+from models.User import User
+from services.NotificationService import NotificationService, AREAS_CHANNEL
+from services.TokenService import TokenService
+from utils.LRUCache import LRUCache
+from utils.MessageBus import MessageBus, InMemoryMessageBus, UnixSocketMessageBus
+from utils.MetricsRegistry import MetricsRegistry
+
+
+class Collector:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, message: dict):
+        self.messages.append(message)
+
+    def wait(self, count: int, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while len(self.messages) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        return self.messages
+
+
+@pytest.fixture
+def unix_buses(tmp_path):
+    buses = [UnixSocketMessageBus(str(tmp_path), 'worker{}'.format(i)) for i in range(2)]
+    for bus in buses:
+        bus.start()
+
+    yield buses
+
+    for bus in buses:
+        bus.close()
+
+
+def test_message_bus_is_abstract():
+    with pytest.raises(TypeError):
+        MessageBus()
+
+
+def test_memory_bus_delivers_to_channel_subscribers():
+    bus = InMemoryMessageBus()
+    areas = Collector()
+    others = Collector()
+
+    def broken(message):
+        raise RuntimeError('subscriber failed')
+
+    bus.subscribe('areas', broken)
+    bus.subscribe('areas', areas)
+    bus.subscribe('others', others)
+
+    bus.publish('areas', {'name': 'area-added'})
+
+    assert areas.messages == [{'name': 'area-added'}]
+    assert others.messages == []
+    assert bus.max_message_size is None
+
+
+def test_unix_bus_delivers_to_every_worker(unix_buses):
+    collectors = [Collector(), Collector()]
+    for bus, collector in zip(unix_buses, collectors):
+        bus.subscribe('areas', collector)
+
+    unix_buses[0].publish('areas', {'name': 'area-added', 'area': {'id': '1'}})
+
+    for collector in collectors:
+        assert collector.wait(1) == [{'name': 'area-added', 'area': {'id': '1'}}]
+
+
+def test_unix_bus_removes_stale_sockets(tmp_path, unix_buses):
+    stale_path = os.path.join(str(tmp_path), 'stale.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stale.bind(stale_path)
+    stale.close()
+
+    collector = Collector()
+    unix_buses[1].subscribe('areas', collector)
+    unix_buses[0].publish('areas', {'name': 'area-deleted'})
+
+    assert collector.wait(1) == [{'name': 'area-deleted'}]
+    assert not os.path.exists(stale_path)
+
+
+def test_unix_bus_rejects_messages_over_the_datagram_limit(unix_buses):
+    bus = unix_buses[0]
+    collector = Collector()
+    bus.subscribe('areas', collector)
+
+    overhead = len(bus.encode('areas', {'data': ''}))
+    bus.publish('areas', {'data': 'x' * (bus.max_message_size - overhead)})
+    assert len(collector.wait(1)) == 1
+
+    with pytest.raises(ValueError):
+        bus.publish('areas', {'data': 'x' * (bus.max_message_size - overhead + 1)})
+
+
+def make_areas(owner: User, count: int):
+    now = datetime.now()
+
+    return [Area(id=ObjectId(), owner=owner, name='Area {}'.format(i), category=0, location='Location {}'.format(i),
+                 location_point=[23.59, 46.77], created_at=now, updated_at=now, version=1) for i in range(count)]
+
+
+@pytest.mark.parametrize('max_message_size', [None, 2000, 5000])
+def test_area_batches_are_split_to_fit_the_bus(max_message_size):
+    bus = InMemoryMessageBus()
+    bus.max_message_size = max_message_size
+    collector = Collector()
+    bus.subscribe(AREAS_CHANNEL, collector)
+
+    notification_service = NotificationService(SocketIO(), bus, LRUCache(16), MetricsRegistry(),
+                                               TokenService(LRUCache(16), LRUCache(16), 0))
+    owner = User(id=ObjectId(), username='batch', first_name='Batch', last_name='User')
+    areas = make_areas(owner, 50)
+
+    notification_service.notify_areas_batch('update', owner, areas)
+
+    items = []
+    for message in collector.messages:
+        assert message['name'] == 'areas-batch'
+        assert message['area']['operation'] == 'update'
+        if max_message_size is not None:
+            assert len(bus.encode(AREAS_CHANNEL, json.loads(json.dumps(message)))) <= max_message_size
+
+        items.extend(message['area']['items'])
+
+    assert [item['id'] for item in items] == [str(area.id) for area in areas]
+    assert (len(collector.messages) == 1) == (max_message_size is None)
@@ -0,0 +1,121 @@
+import pytest
+from bson import ObjectId
+from flask import Flask
+from mongoengine import Document, IntField
+
+from api.pagination import encode_cursor, decode_cursor, get_paginated_items_from_qs, get_limit, CURSOR_NEXT, \
+    CURSOR_PREV
+from config import MAX_PAGINATED_LIMIT
+from utils.errors import PaginationCursorInvalid, PaginationLimitInvalid
+
+app = Flask(__name__)
+
+
+class PaginatedItem(Document):
+    number = IntField()
+
+
+def map_item(item):
+    return item.number
+
+
+@pytest.fixture
+def items(database):
+    PaginatedItem.drop_collection()
+
+    #
+    # Ids increase with the insertion order, the newest item comes first
+    #
+    items = [PaginatedItem(number=i).save() for i in range(2 * MAX_PAGINATED_LIMIT + 1)]
+    return [item.number for item in reversed(items)]
+
+
+def get_page(query_string: dict) -> dict:
+    with app.test_request_context('/', query_string=query_string):
+        return get_paginated_items_from_qs(PaginatedItem.objects, map_item)
+
+
+def test_cursor_round_trip():
+    item_id = ObjectId()
+
+    assert decode_cursor(encode_cursor(CURSOR_NEXT, item_id)) == (CURSOR_NEXT, item_id)
+    assert decode_cursor(encode_cursor(CURSOR_PREV, item_id)) == (CURSOR_PREV, item_id)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    encode_cursor('sideways', ObjectId()),
+    encode_cursor(CURSOR_NEXT, 'not-an-id'),
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(PaginationCursorInvalid):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('limit', ['-1', '0', 'five'])
+def test_invalid_limits_are_rejected(limit):
+    with app.test_request_context('/', query_string={'limit': limit}):
+        with pytest.raises(PaginationLimitInvalid):
+            get_limit()
+
+
+def test_limit_is_capped():
+    with app.test_request_context('/', query_string={'limit': MAX_PAGINATED_LIMIT + 10}):
+        assert get_limit() == MAX_PAGINATED_LIMIT
+
+
+def test_first_page(items):
+    page = get_page({'cursor': '', 'limit': 2})
+
+    assert page['items'] == items[:2]
+    assert page['no_items'] == 2
+    assert page['next_cursor'] is not None
+    assert page['prev_cursor'] is None
+    assert 'no_total_items' not in page
+
+
+def test_next_cursors_walk_every_item_once(items):
+    seen = []
+    cursor = ''
+    pages = 0
+
+    while cursor is not None:
+        page = get_page({'cursor': cursor, 'limit': 3})
+        seen.extend(page['items'])
+        cursor = page['next_cursor']
+        pages += 1
+
+    assert seen == items
+    assert pages == (len(items) + 2) // 3
+
+
+def test_prev_cursor_returns_the_previous_page(items):
+    first = get_page({'cursor': '', 'limit': 2})
+    second = get_page({'cursor': first['next_cursor'], 'limit': 2})
+    assert second['items'] == items[2:4]
+    assert second['prev_cursor'] is not None
+
+    previous = get_page({'cursor': second['prev_cursor'], 'limit': 2})
+    assert previous['items'] == first['items']
+    assert previous['next_cursor'] is not None
+    assert previous['prev_cursor'] is None
+
+
+def test_look_ahead_stops_on_an_exact_last_page(items):
+    #
+    # Leave exactly two full pages so the second one ends on the last item
+    #
+    PaginatedItem.objects(number=items[-1]).delete()
+
+    first = get_page({'cursor': '', 'limit': MAX_PAGINATED_LIMIT})
+    second = get_page({'cursor': first['next_cursor'], 'limit': MAX_PAGINATED_LIMIT})
+
+    assert second['items'] == items[MAX_PAGINATED_LIMIT:-1]
+    assert second['next_cursor'] is None
+
+
+def test_count_adds_the_total(items):
+    page = get_page({'cursor': '', 'limit': 2, 'count': '1'})
+
+    assert page['no_total_items'] == len(items)
+
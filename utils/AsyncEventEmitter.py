@@ -0,0 +1,86 @@
+import traceback
+from queue import Queue, Full
+from threading import Thread, Lock
+from time import monotonic
+
+from pyee import BaseEventEmitter
+
+
+class AsyncEventEmitter:
+    def __init__(self, max_size: int):
+        self.__emitter = BaseEventEmitter()
+        self.__queue = Queue(max_size)
+        self.__lock = Lock()
+        self.__thread = None
+        self.__closed = False
+
+        self.dispatched = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def on(self, event, fn):
+        self.__emitter.on(event, fn)
+
+    def __start(self):
+        with self.__lock:
+            if self.__thread is not None:
+                return
+
+            self.__thread = Thread(target=self.__run, name='async-event-emitter', daemon=True)
+            self.__thread.start()
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+
+            queued_at, event, args = item
+
+            self.last_lag = monotonic() - queued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+
+            try:
+                self.__emitter.emit(event, *args)
+            except Exception:
+                traceback.print_exc()
+
+            self.dispatched += 1
+
+    def emit(self, event, *args) -> bool:
+        if self.__closed:
+            self.dropped += 1
+            return False
+
+        self.__start()
+
+        #
+        # A single consumer drains the queue, so events are handled in the
+        # order they were emitted
+        #
+        try:
+            self.__queue.put_nowait((monotonic(), event, args))
+        except Full:
+            self.dropped += 1
+            return False
+
+        return True
+
+    def close(self, timeout: float = 5):
+        self.__closed = True
+
+        if self.__thread is None:
+            return
+
+        self.__queue.put(None)
+        self.__thread.join(timeout)
+
+    def get_stats(self):
+        return {
+            'depth': self.__queue.qsize(),
+            'dispatched': self.dispatched,
+            'dropped': self.dropped,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+        }
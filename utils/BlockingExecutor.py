@@ -0,0 +1,55 @@
+from threading import Lock
+
+from utils.errors import ServerBusy
+
+EXECUTOR_MODE_TPOOL = 'tpool'
+EXECUTOR_MODE_INLINE = 'inline'
+
+
+class BlockingExecutor:
+    def __init__(self, mode: str, max_workers: int, max_pending: int):
+        self.__mode = mode
+        self.__max_pending = max_pending
+        self.__pending = 0
+        self.__rejected = 0
+        self.__lock = Lock()
+        self.__tpool = None
+
+        #
+        # tpool runs the work on real OS threads. A ThreadPoolExecutor would
+        # be built on the monkey patched threading module and its green
+        # threads would still block the hub
+        #
+        if mode == EXECUTOR_MODE_TPOOL:
+            from eventlet import tpool
+            tpool.set_num_threads(max_workers)
+            self.__tpool = tpool
+        elif mode != EXECUTOR_MODE_INLINE:
+            raise ValueError('Invalid executor mode {}'.format(mode))
+
+    def __execute(self, fn, *args, **kwargs):
+        if self.__mode == EXECUTOR_MODE_TPOOL:
+            return self.__tpool.execute(fn, *args, **kwargs)
+        else:
+            return fn(*args, **kwargs)
+
+    def run(self, fn, *args, **kwargs):
+        with self.__lock:
+            if self.__pending >= self.__max_pending:
+                self.__rejected += 1
+                raise ServerBusy()
+
+            self.__pending += 1
+
+        try:
+            return self.__execute(fn, *args, **kwargs)
+        finally:
+            with self.__lock:
+                self.__pending -= 1
+
+    def get_stats(self):
+        return {
+            'pending': self.__pending,
+            'max_pending': self.__max_pending,
+            'rejected': self.__rejected,
+        }
@@ -0,0 +1,82 @@
+import traceback
+from threading import Lock, Timer
+
+
+class Debouncer:
+    def __init__(self, window: float, fn):
+        self.__window = window
+        self.__fn = fn
+        self.__pending = {}
+        self.__timers = {}
+        self.__lock = Lock()
+        self.__flush_lock = Lock()
+
+        self.submitted = 0
+        self.flushed = 0
+        self.cancelled = 0
+
+    def submit(self, key, *args):
+        with self.__lock:
+            self.submitted += 1
+
+            scheduled = key in self.__pending
+            self.__pending[key] = args
+            if scheduled:
+                return
+
+            timer = Timer(self.__window, self.flush, (key,))
+            timer.daemon = True
+            self.__timers[key] = timer
+
+        timer.start()
+
+    def flush(self, key):
+        #
+        # Flushing and cancelling are serialized so that a cancel returns only
+        # after an in progress flush for the same key has finished
+        #
+        with self.__flush_lock:
+            with self.__lock:
+                args = self.__pending.pop(key, None)
+                timer = self.__timers.pop(key, None)
+
+            if timer is not None:
+                timer.cancel()
+
+            if args is None:
+                return
+
+            self.flushed += 1
+
+            try:
+                self.__fn(*args)
+            except Exception:
+                traceback.print_exc()
+
+    def flush_all(self):
+        for key in list(self.__pending.keys()):
+            self.flush(key)
+
+    def cancel(self, key) -> bool:
+        with self.__flush_lock:
+            with self.__lock:
+                args = self.__pending.pop(key, None)
+                timer = self.__timers.pop(key, None)
+
+        if timer is not None:
+            timer.cancel()
+
+        if args is None:
+            return False
+
+        self.cancelled += 1
+        return True
+
+    def get_stats(self):
+        return {
+            'pending': len(self.__pending),
+            'submitted': self.submitted,
+            'flushed': self.flushed,
+            'cancelled': self.cancelled,
+            'saved': self.submitted - self.flushed - len(self.__pending),
+        }
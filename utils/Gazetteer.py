@@ -0,0 +1,134 @@
+import csv
+import json
+from array import array
+from math import radians, cos, sin, asin, inf
+from typing import List, Union
+
+from utils.geo import EARTH_RADIUS
+
+
+def to_unit_vector(latitude: float, longitude: float):
+    latitude = radians(latitude)
+    longitude = radians(longitude)
+    return cos(latitude) * cos(longitude), cos(latitude) * sin(longitude), sin(latitude)
+
+
+def chord_to_distance(chord_squared: float) -> float:
+    return 2 * EARTH_RADIUS * asin(min(1.0, chord_squared ** 0.5 / 2))
+
+
+class Gazetteer:
+    def __init__(self, names: List[str], latitudes: List[float], longitudes: List[float]):
+        self.__names = names
+        self.__coordinates = (array('d'), array('d'), array('d'))
+
+        for latitude, longitude in zip(latitudes, longitudes):
+            for axis, value in enumerate(to_unit_vector(latitude, longitude)):
+                self.__coordinates[axis].append(value)
+
+        #
+        # The k-d tree is stored implicitly in the order array, the median of
+        # each range is the node splitting it on the axis given by its depth
+        #
+        self.__order = array('l', range(len(names)))
+        self.__build(0, len(names), 0)
+
+    def __build(self, lo: int, hi: int, axis: int):
+        stack = [(lo, hi, axis)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= 1:
+                continue
+
+            values = self.__coordinates[axis]
+            self.__order[lo:hi] = array('l', sorted(self.__order[lo:hi], key=values.__getitem__))
+
+            mid = (lo + hi) // 2
+            next_axis = (axis + 1) % 3
+            stack.append((lo, mid, next_axis))
+            stack.append((mid + 1, hi, next_axis))
+
+    def __len__(self):
+        return len(self.__names)
+
+    def nearest(self, latitude: float, longitude: float) -> Union[tuple, None]:
+        if not self.__names:
+            return None
+
+        query = to_unit_vector(latitude, longitude)
+        xs, ys, zs = self.__coordinates
+        best_index = -1
+        best_distance = inf
+
+        stack = [(0, len(self.__names), 0, 0.0)]
+        while stack:
+            lo, hi, axis, bound = stack.pop()
+            if lo >= hi or bound >= best_distance:
+                continue
+
+            mid = (lo + hi) // 2
+            index = self.__order[mid]
+
+            dx = xs[index] - query[0]
+            dy = ys[index] - query[1]
+            dz = zs[index] - query[2]
+            distance = dx * dx + dy * dy + dz * dz
+            if distance < best_distance:
+                best_distance = distance
+                best_index = index
+
+            diff = query[axis] - self.__coordinates[axis][index]
+            next_axis = (axis + 1) % 3
+            if diff < 0:
+                near, far = (lo, mid), (mid + 1, hi)
+            else:
+                near, far = (mid + 1, hi), (lo, mid)
+
+            stack.append((far[0], far[1], next_axis, diff * diff))
+            stack.append((near[0], near[1], next_axis, 0.0))
+
+        return self.__names[best_index], chord_to_distance(best_distance)
+
+    @classmethod
+    def load_csv(cls, path: str):
+        names = []
+        latitudes = []
+        longitudes = []
+
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                names.append(row.get('address') or row['name'])
+                latitudes.append(float(row['latitude']))
+                longitudes.append(float(row['longitude']))
+
+        return cls(names, latitudes, longitudes)
+
+    @classmethod
+    def load_geojson(cls, path: str):
+        names = []
+        latitudes = []
+        longitudes = []
+
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        for feature in data['features']:
+            geometry = feature.get('geometry')
+            if not geometry or geometry['type'] != 'Point':
+                continue
+
+            properties = feature.get('properties') or {}
+            longitude, latitude = geometry['coordinates'][:2]
+
+            names.append(properties.get('display_name') or properties.get('address') or properties['name'])
+            latitudes.append(float(latitude))
+            longitudes.append(float(longitude))
+
+        return cls(names, latitudes, longitudes)
+
+    @classmethod
+    def load(cls, path: str):
+        if path.endswith('.csv'):
+            return cls.load_csv(path)
+
+        return cls.load_geojson(path)
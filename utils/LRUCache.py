@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LRUCache:
+    def __init__(self, max_size: int, ttl: float = None):
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__items = OrderedDict()
+        self.__lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.__lock:
+            entry = self.__items.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= monotonic():
+                del self.__items[key]
+                self.misses += 1
+                return default
+
+            self.__items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        if ttl is None:
+            ttl = self.__ttl
+
+        if ttl is None:
+            expires_at = None
+        else:
+            expires_at = monotonic() + ttl
+
+        with self.__lock:
+            self.__items[key] = (value, expires_at)
+            self.__items.move_to_end(key)
+
+            while len(self.__items) > self.__max_size:
+                self.__items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self.__lock:
+            entry = self.__items.pop(key, None)
+
+        if entry is None:
+            return default
+
+        return entry[0]
+
+    def clear(self):
+        with self.__lock:
+            self.__items.clear()
+
+    def __len__(self):
+        return len(self.__items)
+
+    def get_stats(self):
+        return {
+            'size': len(self.__items),
+            'max_size': self.__max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
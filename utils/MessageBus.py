@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import traceback
+from abc import ABC, abstractmethod
+from threading import Thread
+
+MAX_RECEIVE_SIZE = 1 << 20
+
+SEND_BUFFER_HEADROOM = 1024
+
+
+class MessageBus(ABC):
+    max_message_size = None
+
+    def __init__(self):
+        self.__subscribers = {}
+
+    @staticmethod
+    def encode(channel: str, message: dict) -> bytes:
+        return json.dumps({
+            'channel': channel,
+            'message': message,
+        }).encode('utf-8')
+
+    def subscribe(self, channel: str, fn):
+        self.__subscribers.setdefault(channel, []).append(fn)
+
+    def deliver(self, channel: str, message: dict):
+        for fn in self.__subscribers.get(channel, []):
+            try:
+                fn(message)
+            except Exception:
+                traceback.print_exc()
+
+    @abstractmethod
+    def publish(self, channel: str, message: dict):
+        pass
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class InMemoryMessageBus(MessageBus):
+    def publish(self, channel: str, message: dict):
+        self.deliver(channel, message)
+
+
+class UnixSocketMessageBus(MessageBus):
+    def __init__(self, directory: str, name: str = None):
+        super().__init__()
+
+        if name is None:
+            name = str(os.getpid())
+
+        self.__directory = directory
+        self.__path = os.path.join(directory, '{}.sock'.format(name))
+        self.__sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.__receiver = None
+        self.__thread = None
+
+        #
+        # A datagram has to fit in the sender's socket buffer along with the
+        # kernel's bookkeeping, larger ones fail with EMSGSIZE
+        #
+        self.max_message_size = self.__sender.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) - SEND_BUFFER_HEADROOM
+
+    def start(self):
+        os.makedirs(self.__directory, exist_ok=True)
+
+        if os.path.exists(self.__path):
+            os.unlink(self.__path)
+
+        self.__receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.__receiver.bind(self.__path)
+
+        self.__thread = Thread(target=self.__run, name='unix-socket-message-bus', daemon=True)
+        self.__thread.start()
+
+    def __run(self):
+        while True:
+            try:
+                data = self.__receiver.recv(MAX_RECEIVE_SIZE)
+            except OSError:
+                break
+
+            try:
+                packet = json.loads(data.decode('utf-8'))
+            except ValueError:
+                traceback.print_exc()
+                continue
+
+            self.deliver(packet['channel'], packet['message'])
+
+    def publish(self, channel: str, message: dict):
+        data = self.encode(channel, message)
+        if len(data) > self.max_message_size:
+            raise ValueError('Message of {} bytes is larger than the {} bytes a datagram can hold'
+                             .format(len(data), self.max_message_size))
+
+        #
+        # Every worker binds a datagram socket in the shared directory, send
+        # the message to all of them, including this one
+        #
+        try:
+            names = os.listdir(self.__directory)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            if not name.endswith('.sock'):
+                continue
+
+            path = os.path.join(self.__directory, name)
+            try:
+                self.__sender.sendto(data, path)
+            except ConnectionRefusedError:
+                self.__remove_stale(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                traceback.print_exc()
+
+    def __remove_stale(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self.__receiver is not None:
+            self.__receiver.close()
+            self.__remove_stale(self.__path)
+
+        self.__sender.close()
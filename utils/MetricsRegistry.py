@@ -0,0 +1,119 @@
+from threading import Lock
+
+METRIC_TYPE_COUNTER = 'counter'
+METRIC_TYPE_GAUGE = 'gauge'
+METRIC_TYPE_HISTOGRAM = 'histogram'
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels) -> str:
+    if not labels:
+        return ''
+
+    return '{{{}}}'.format(','.join('{}="{}"'.format(key, escape_label_value(value)) for key, value in labels))
+
+
+def format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    def __init__(self, name: str, metric_type: str, description: str, buckets=None):
+        self.name = name
+        self.type = metric_type
+        self.description = description
+        self.buckets = buckets
+        self.samples = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__metrics = {}
+
+    def __register(self, name: str, metric_type: str, description: str, buckets=None):
+        with self.__lock:
+            if name not in self.__metrics:
+                self.__metrics[name] = Metric(name, metric_type, description, buckets)
+
+    def register_counter(self, name: str, description: str):
+        self.__register(name, METRIC_TYPE_COUNTER, description)
+
+    def register_gauge(self, name: str, description: str):
+        self.__register(name, METRIC_TYPE_GAUGE, description)
+
+    def register_histogram(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        self.__register(name, METRIC_TYPE_HISTOGRAM, description, tuple(buckets) + (float('inf'),))
+
+    def inc(self, name: str, labels: dict = None, value: float = 1):
+        key = tuple(sorted(labels.items())) if labels else ()
+
+        with self.__lock:
+            samples = self.__metrics[name].samples
+            samples[key] = samples.get(key, 0) + value
+
+    def set(self, name: str, labels: dict = None, value: float = 0):
+        key = tuple(sorted(labels.items())) if labels else ()
+
+        with self.__lock:
+            self.__metrics[name].samples[key] = value
+
+    def observe(self, name: str, labels: dict = None, value: float = 0):
+        key = tuple(sorted(labels.items())) if labels else ()
+
+        with self.__lock:
+            metric = self.__metrics[name]
+
+            sample = metric.samples.get(key)
+            if sample is None:
+                sample = metric.samples[key] = {
+                    'buckets': [0] * len(metric.buckets),
+                    'sum': 0,
+                    'count': 0,
+                }
+
+            #
+            # Only the first matching bucket is counted, the cumulative counts
+            # are computed when rendering
+            #
+            for i, bound in enumerate(metric.buckets):
+                if value <= bound:
+                    sample['buckets'][i] += 1
+                    break
+
+            sample['sum'] += value
+            sample['count'] += 1
+
+    def render(self) -> str:
+        lines = []
+
+        with self.__lock:
+            for metric in self.__metrics.values():
+                lines.append('# HELP {} {}'.format(metric.name, metric.description))
+                lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+
+                for key, sample in metric.samples.items():
+                    if metric.type != METRIC_TYPE_HISTOGRAM:
+                        lines.append('{}{} {}'.format(metric.name, format_labels(key), format_value(sample)))
+                        continue
+
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, sample['buckets']):
+                        cumulative += count
+                        bucket_key = key + (('le', format_value(bound)),)
+                        lines.append('{}_bucket{} {}'.format(metric.name, format_labels(bucket_key), cumulative))
+
+                    lines.append('{}_sum{} {}'.format(metric.name, format_labels(key), format_value(sample['sum'])))
+                    lines.append('{}_count{} {}'.format(metric.name, format_labels(key), sample['count']))
+
+        lines.append('')
+
+        return '\n'.join(lines)
@@ -0,0 +1,26 @@
+from flask import g, has_request_context
+from pymongo import monitoring
+
+from utils.MetricsRegistry import MetricsRegistry
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    def __init__(self, registry: MetricsRegistry):
+        self.__registry = registry
+
+        self.__registry.register_counter('mongo_commands_total', 'Mongo commands issued')
+        self.__registry.register_counter('mongo_command_failures_total', 'Mongo commands that failed')
+        self.__registry.register_histogram('mongo_command_duration_seconds', 'Mongo command duration')
+
+    def started(self, event):
+        self.__registry.inc('mongo_commands_total', {'command': event.command_name})
+
+        if has_request_context():
+            g.mongo_commands = g.get('mongo_commands', 0) + 1
+
+    def succeeded(self, event):
+        self.__registry.observe('mongo_command_duration_seconds', {'command': event.command_name},
+                                event.duration_micros / 1000000)
+
+    def failed(self, event):
+        self.__registry.inc('mongo_command_failures_total', {'command': event.command_name})
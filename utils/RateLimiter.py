@@ -0,0 +1,53 @@
+from threading import Lock
+from time import monotonic, sleep
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int, max_wait: float, max_queue: int):
+        self.__interval = 1 / rate
+        self.__tolerance = (burst - 1) * self.__interval
+        self.__max_wait = max_wait
+        self.__max_queue = max_queue
+        self.__lock = Lock()
+
+        #
+        # Token bucket implemented as GCRA, each acquire reserves the next
+        # free slot so callers are served in order without polling
+        #
+        self.__theoretical_arrival = monotonic()
+        self.waiting = 0
+
+        self.delayed = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        with self.__lock:
+            now = monotonic()
+            arrival = max(self.__theoretical_arrival, now)
+            wait = arrival - self.__tolerance - now
+
+            if wait > 0:
+                if wait > self.__max_wait or self.waiting >= self.__max_queue:
+                    self.rejected += 1
+                    return False
+
+                self.waiting += 1
+                self.delayed += 1
+
+            self.__theoretical_arrival = arrival + self.__interval
+
+        if wait > 0:
+            try:
+                sleep(wait)
+            finally:
+                with self.__lock:
+                    self.waiting -= 1
+
+        return True
+
+    def get_stats(self):
+        return {
+            'waiting': self.waiting,
+            'delayed': self.delayed,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,47 @@
+from threading import Event, Lock
+
+
+class SingleFlightCall:
+    def __init__(self):
+        self.event = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.__calls = {}
+        self.__lock = Lock()
+
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self.__lock:
+            call = self.__calls.get(key)
+            if call is None:
+                call = SingleFlightCall()
+                self.__calls[key] = call
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+            call.event.set()
+
+        return call.result
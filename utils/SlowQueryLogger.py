@@ -0,0 +1,171 @@
+import json
+import os
+import random
+import traceback
+from datetime import datetime
+from queue import Queue, Full
+from threading import Thread, Lock
+
+from flask import request, has_request_context
+from mongoengine.connection import get_db
+from pymongo import monitoring
+
+from utils.explain import get_winning_plan, get_winning_stages, get_query_shape
+
+EXPLAINABLE_COMMANDS = ['find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify']
+
+QUERY_SHAPE_FIELDS = ['filter', 'query', 'q', 'pipeline', 'updates', 'deletes']
+
+
+def get_command_collection(command_name: str, command: dict):
+    if command_name == 'getMore':
+        return command.get('collection')
+
+    collection = command.get(command_name)
+    if isinstance(collection, str):
+        return collection
+
+    return None
+
+
+def get_docs_returned(reply: dict):
+    cursor = reply.get('cursor')
+    if isinstance(cursor, dict):
+        return len(cursor.get('firstBatch', cursor.get('nextBatch', [])))
+
+    return reply.get('n')
+
+
+class SlowQueryLogger(monitoring.CommandListener):
+    def __init__(self, path: str, threshold: float, explain_rate: float = 0, explain_queue_size: int = 64):
+        self.__path = path
+        self.__threshold_micros = threshold * 1000000
+        self.__explain_rate = explain_rate
+        self.__explain_queue = Queue(explain_queue_size)
+        self.__explain_thread = None
+        self.__lock = Lock()
+        self.__started = {}
+
+        self.logged = 0
+        self.explained = 0
+        self.explains_dropped = 0
+        self.explains_failed = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, record: dict):
+        line = json.dumps(record, default=str)
+
+        with self.__lock:
+            with open(self.__path, 'a') as f:
+                f.write(line + '\n')
+
+    def started(self, event):
+        #
+        # The originating endpoint is only known in the greenlet that issued
+        # the command, remember it until the command completes
+        #
+        if event.command_name == 'explain':
+            return
+
+        endpoint = request.endpoint if has_request_context() else None
+        self.__started[(event.connection_id, event.request_id)] = (event.command, event.database_name, endpoint)
+
+    def succeeded(self, event):
+        started = self.__started.pop((event.connection_id, event.request_id), None)
+        if started is None or event.duration_micros < self.__threshold_micros:
+            return
+
+        command, database_name, endpoint = started
+        self.log(event, command, database_name, endpoint, get_docs_returned(event.reply))
+
+    def failed(self, event):
+        started = self.__started.pop((event.connection_id, event.request_id), None)
+        if started is None or event.duration_micros < self.__threshold_micros:
+            return
+
+        command, database_name, endpoint = started
+        self.log(event, command, database_name, endpoint, None, event.failure)
+
+    def log(self, event, command: dict, database_name: str, endpoint: str, docs_returned, failure=None):
+        record = {
+            'type': 'slow-query',
+            'time': datetime.utcnow().isoformat(),
+            'command': event.command_name,
+            'database': database_name,
+            'collection': get_command_collection(event.command_name, command),
+            'duration_ms': event.duration_micros / 1000,
+            'docs_returned': docs_returned,
+            'endpoint': endpoint,
+        }
+
+        for field in QUERY_SHAPE_FIELDS:
+            if field in command:
+                record['shape'] = {field: get_query_shape(command[field])}
+                break
+
+        if 'sort' in command:
+            record['sort'] = command['sort']
+
+        if failure is not None:
+            record['failure'] = failure
+
+        self.write(record)
+        self.logged += 1
+
+        if event.command_name in EXPLAINABLE_COMMANDS and random.random() < self.__explain_rate:
+            self.queue_explain(record, command)
+
+    def queue_explain(self, record: dict, command: dict):
+        with self.__lock:
+            if self.__explain_thread is None:
+                self.__explain_thread = Thread(target=self.__run_explains, name='slow-query-explain', daemon=True)
+                self.__explain_thread.start()
+
+        #
+        # Session and cluster fields are added by the driver and are not
+        # accepted inside an explain
+        #
+        command = {key: value for key, value in command.items() if not key.startswith('$') and key != 'lsid'}
+
+        try:
+            self.__explain_queue.put_nowait((record, command))
+        except Full:
+            self.explains_dropped += 1
+
+    def __run_explains(self):
+        while True:
+            record, command = self.__explain_queue.get()
+
+            #
+            # An explain that fails or has an unexpected layout must not stop
+            # the thread, the following ones are still written
+            #
+            try:
+                explain = get_db().command({'explain': command, 'verbosity': 'queryPlanner'})
+                winning_plan = get_winning_plan(explain)
+
+                self.write({
+                    'type': 'explain',
+                    'time': datetime.utcnow().isoformat(),
+                    'command': record['command'],
+                    'collection': record['collection'],
+                    'endpoint': record['endpoint'],
+                    'stages': get_winning_stages(winning_plan),
+                    'winning_plan': winning_plan,
+                })
+                self.explained += 1
+            except Exception:
+                self.explains_failed += 1
+                traceback.print_exc()
+
+    def get_stats(self):
+        return {
+            'logged': self.logged,
+            'explained': self.explained,
+            'explains_dropped': self.explains_dropped,
+            'explains_failed': self.explains_failed,
+            'explains_pending': self.__explain_queue.qsize(),
+        }
@@ -0,0 +1,129 @@
+import zlib
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self.__compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self.__compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.__compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self.__compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush()
+
+
+compressor_classes = {
+    'gzip': GzipCompressor,
+}
+
+if brotli is not None:
+    compressor_classes['br'] = BrotliCompressor
+
+if zstandard is not None:
+    compressor_classes['zstd'] = ZstdCompressor
+
+
+def get_available_encodings(encodings: list) -> list:
+    return [encoding for encoding in encodings if encoding in compressor_classes]
+
+
+def make_compressor(encoding: str, level: int):
+    return compressor_classes[encoding](level)
+
+
+def compress(encoding: str, level: int, data: bytes) -> bytes:
+    compressor = make_compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def generate_compressed(compressor, chunks):
+    #
+    # Flush after every chunk so that clients can decode the items streamed
+    # so far instead of waiting for the compressor's buffer to fill up
+    #
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+
+    yield compressor.finish()
+
+
+def is_compressible(response: Response, mimetypes: list) -> bool:
+    if response.direct_passthrough or response.mimetype not in mimetypes:
+        return False
+
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+
+    return 'Content-Encoding' not in response.headers
+
+
+def compress_response(response: Response, encoding: str, level: int, min_size: int) -> Response:
+    if response.is_streamed:
+        response.response = generate_compressed(make_compressor(encoding, level), response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(compress(encoding, level, data))
+
+    response.headers['Content-Encoding'] = encoding
+
+    #
+    # The compressed body is no longer byte for byte the one the strong ETag
+    # was computed for
+    #
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
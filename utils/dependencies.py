@@ -1,34 +1,96 @@
+from functools import partial
+
 from injector import Injector, singleton
 from flask_socketio import SocketIO
+from geopy.geocoders import Nominatim
+from mongoengine import DoesNotExist, ValidationError
 
+from config import USER_CACHE_SIZE, USER_CACHE_TTL, PASSWORD_HASH_ROUNDS, PASSWORD_HASH_EXECUTOR, \
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, GEOCODE_USER_AGENT, GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL, \
+    GEOCODE_REVERSE_PRECISION, GEOCODE_RATE_LIMIT, GEOCODE_RATE_BURST, GEOCODE_MAX_WAIT, GEOCODE_MAX_QUEUE, \
+    GEOCODE_GAZETTEER_PATH, GEOCODE_GAZETTEER_MAX_DISTANCE, GEOCODE_BATCH_WORKERS, AREA_EVENTS_QUEUE_SIZE, \
+    MESSAGE_BUS, MESSAGE_BUS_SOCKET_DIR, AREA_UPDATE_COALESCE_WINDOW, AREA_SNAPSHOT_CACHE_SIZE, TOKEN_CACHE_SIZE, \
+    FRESH_ACCESS_TOKEN_REUSE_MARGIN, DB_MOCK
+from models.User import User
 from services.AreaService import AreaService, AreaServiceEvents
+from services.GeocodeService import GeocodeService
+from services.MetricsService import MetricsService
 from services.NotificationService import NotificationService, NotificationServiceEvents
+from services.TokenService import TokenService
 from services.UserService import UserService
+from utils.AsyncEventEmitter import AsyncEventEmitter
+from utils.BlockingExecutor import BlockingExecutor
+from utils.Gazetteer import Gazetteer
+from utils.LRUCache import LRUCache
+from utils.MessageBus import MessageBus, InMemoryMessageBus, UnixSocketMessageBus
+from utils.MetricsRegistry import MetricsRegistry
+from utils.RateLimiter import RateLimiter
 from validators.AreaValidator import AreaValidator
 from validators.UserValidator import UserValidator
 
 
-def configure_services(binder):
+def configure_services(binder, geolocator=None, geocode_rate_limiter=None):
+    metrics_registry = MetricsRegistry()
+    binder.bind(MetricsRegistry, to=metrics_registry, scope=singleton)
+
     user_validator = UserValidator()
-    user_service = UserService(user_validator)
+    user_cache = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+    password_executor = BlockingExecutor(PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+    user_service = UserService(user_validator, user_cache, password_executor, PASSWORD_HASH_ROUNDS)
     binder.bind(UserService, to=user_service, scope=singleton)
 
+    decoded_tokens_cache = LRUCache(TOKEN_CACHE_SIZE)
+    fresh_access_tokens_cache = LRUCache(TOKEN_CACHE_SIZE)
+    token_service = TokenService(decoded_tokens_cache, fresh_access_tokens_cache, FRESH_ACCESS_TOKEN_REUSE_MARGIN)
+    binder.bind(TokenService, to=token_service, scope=singleton)
+
     area_validator = AreaValidator()
-    area_service = AreaService(area_validator)
+    area_events_emitter = AsyncEventEmitter(AREA_EVENTS_QUEUE_SIZE)
+    area_service = AreaService(area_validator, area_events_emitter, not DB_MOCK)
     binder.bind(AreaService, to=area_service, scope=singleton)
 
+    if geolocator is None:
+        geolocator = Nominatim(user_agent=GEOCODE_USER_AGENT)
+
+    if geocode_rate_limiter is None:
+        geocode_rate_limiter = RateLimiter(GEOCODE_RATE_LIMIT, GEOCODE_RATE_BURST, GEOCODE_MAX_WAIT,
+                                           GEOCODE_MAX_QUEUE)
+
+    geocode_cache = LRUCache(GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL)
+    gazetteer = Gazetteer.load(GEOCODE_GAZETTEER_PATH) if GEOCODE_GAZETTEER_PATH else None
+    geocode_service = GeocodeService(geolocator, geocode_cache, geocode_rate_limiter, GEOCODE_REVERSE_PRECISION,
+                                     gazetteer, GEOCODE_GAZETTEER_MAX_DISTANCE, GEOCODE_BATCH_WORKERS)
+    binder.bind(GeocodeService, to=geocode_service, scope=singleton)
+
     socket_server = SocketIO(cors_allowed_origins='*')
     binder.bind(SocketIO, to=socket_server, scope=singleton)
 
-    notification_service = NotificationService(socket_server)
+    if MESSAGE_BUS == 'unix':
+        message_bus = UnixSocketMessageBus(MESSAGE_BUS_SOCKET_DIR)
+    else:
+        message_bus = InMemoryMessageBus()
+    binder.bind(MessageBus, to=message_bus, scope=singleton)
+
+    area_snapshots = LRUCache(AREA_SNAPSHOT_CACHE_SIZE)
+    notification_service = NotificationService(socket_server, message_bus, area_snapshots, metrics_registry,
+                                               token_service, AREA_UPDATE_COALESCE_WINDOW)
     binder.bind(NotificationService, to=notification_service, scope=singleton)
 
+    metrics_service = MetricsService(metrics_registry, user_service, token_service, geocode_service,
+                                     notification_service)
+    metrics_service.add_stats_source('password_executor', password_executor.get_stats)
+    metrics_service.add_stats_source('area_events', area_events_emitter.get_stats)
+    binder.bind(MetricsService, to=metrics_service, scope=singleton)
+
     area_service.emitter.on(AreaServiceEvents.AREA_ADDED, notification_service.notify_area_add)
     area_service.emitter.on(AreaServiceEvents.AREA_UPDATED, notification_service.notify_area_update)
     area_service.emitter.on(AreaServiceEvents.AREA_DELETED, notification_service.notify_area_delete)
+    area_service.emitter.on(AreaServiceEvents.AREAS_ADDED, notification_service.notify_areas_add)
+    area_service.emitter.on(AreaServiceEvents.AREAS_UPDATED, notification_service.notify_areas_update)
+    area_service.emitter.on(AreaServiceEvents.AREAS_DELETED, notification_service.notify_areas_delete)
 
     def notification_service_on_authentication_try_link(sid: str, username: str):
-        user = user_service.find_one_by(username=username)
+        user = user_service.find_one_by_username(username)
         if not user:
             notification_service.notify_authenticate_error(sid)
             return
@@ -38,5 +100,20 @@ def configure_services(binder):
     notification_service.emitter.on(NotificationServiceEvents.AUTHENTICATE_TRY_LINK,
                                     notification_service_on_authentication_try_link)
 
+    def notification_service_on_area_resync(sid: str, user: User, area_id: str):
+        try:
+            area = area_service.find_one_by(owner=user, id=area_id)
+        except (DoesNotExist, ValidationError):
+            notification_service.notify_area_resync_error(sid, area_id)
+            return
+
+        notification_service.send_area_snapshot(sid, area, user)
+
+    notification_service.emitter.on(NotificationServiceEvents.AREA_RESYNC, notification_service_on_area_resync)
+
+
+def create_services_injector(**kwargs) -> Injector:
+    return Injector([partial(configure_services, **kwargs)])
+
 
-services_injector = Injector([configure_services])
+services_injector = create_services_injector()
@@ -66,6 +66,23 @@ class MultiError(APIError):
         return d
 
 
+class BatchError(MultiError):
+    def __init__(self, code, status, message, *args, **kwargs):
+        super().__init__(code, status, message, *args, **kwargs)
+
+        self.indices = []
+
+    def add_item_error(self, index: int, error: Exception):
+        self.errors.append(error)
+        self.indices.append(index)
+
+    def to_dict(self):
+        d = super().to_dict()
+        for error_dict, index in zip(d['errors'], self.indices):
+            error_dict['index'] = index
+        return d
+
+
 def make_error(base_class, name, code, status, default_message, **default_kwargs):
     def __init__(self, message=default_message, **kwargs):
         merged_kwargs = {}
@@ -90,12 +107,23 @@ def make_multi_error(name, code, status, message, **kwargs):
     return make_error(MultiError, name, code, status, message, **kwargs)
 
 
+def make_batch_error(name, code, status, message, **kwargs):
+    return make_error(BatchError, name, code, status, message, **kwargs)
+
+
 PaginationLimitInvalid = make_api_error('PaginationLimitInvalid',
                                         'pagination-limit-invalid', 400,
                                         'Pagination limit invalid')
 PaginationPageInvalid = make_api_error('PaginationPageInvalid',
                                        'pagination-page-invalid', 400,
                                        'Pagination page invalid')
+PaginationCursorInvalid = make_api_error('PaginationCursorInvalid',
+                                         'pagination-cursor-invalid', 400,
+                                         'Pagination cursor invalid')
+
+ServerBusy = make_api_error('ServerBusy',
+                            'server-busy', 503,
+                            'Server is busy, try again later')
 
 JWTHeaderMissing = make_api_error('JWTHeaderMissing',
                                   'jwt-header-missing', 403,
@@ -150,6 +178,12 @@ UserLastNameInvalid = make_validation_error('UserLastNameInvalid',
 AreaDoesNotExist = make_api_error('AreaDoesNotExist',
                                   'area-not-exist', 404,
                                   'Area does not exist')
+AreaImageDoesNotExist = make_api_error('AreaImageDoesNotExist',
+                                       'area-image-not-exist', 404,
+                                       'Area image does not exist')
+AreaUpdateConflict = make_api_error('AreaUpdateConflict',
+                                    'area-update-conflict', 409,
+                                    'Area was updated concurrently, fetch it and try again')
 
 AreaAddFailed = make_multi_error('AreaAddFailed',
                                  'area-add-failed', 400,
@@ -157,6 +191,9 @@ AreaAddFailed = make_multi_error('AreaAddFailed',
 AreaUpdateFailed = make_multi_error('AreaUpdateFailed',
                                     'area-update-failed', 400,
                                     'Area update failed')
+AreaBatchFailed = make_batch_error('AreaBatchFailed',
+                                   'area-batch-failed', 400,
+                                   'Area batch failed')
 
 AreaUpdatedAtTimestampInvalid = make_validation_error('AreaUpdatedAtTimestampInvalid',
                                                       'area-updated-at-timestamp-invalid', 400,
@@ -187,7 +224,44 @@ AreaImageInvalid = make_validation_error('AreaImageInvalid',
                                          'area-image-invalid', 400,
                                          'Is invalid',
                                          field_name='image')
+AreaBatchItemDuplicate = make_validation_error('AreaBatchItemDuplicate',
+                                               'area-batch-item-duplicate', 400,
+                                               'Appears more than once in batch',
+                                               field_name='id')
+AreaBatchOperationInvalid = make_validation_error('AreaBatchOperationInvalid',
+                                                  'area-batch-operation-invalid', 400,
+                                                  'Is invalid',
+                                                  field_name='operation',
+                                                  valid_values=['add', 'update', 'delete'])
+AreaBatchItemsInvalid = make_validation_error('AreaBatchItemsInvalid',
+                                              'area-batch-items-invalid', 400,
+                                              'Is invalid',
+                                              field_name='items')
 
+AreaQueryLatitudeInvalid = make_validation_error('AreaQueryLatitudeInvalid',
+                                                 'area-query-latitude-invalid', 400,
+                                                 'Is invalid',
+                                                 field_name='lat')
+AreaQueryLongitudeInvalid = make_validation_error('AreaQueryLongitudeInvalid',
+                                                  'area-query-longitude-invalid', 400,
+                                                  'Is invalid',
+                                                  field_name='lon')
+AreaQueryMaxDistanceInvalid = make_validation_error('AreaQueryMaxDistanceInvalid',
+                                                    'area-query-max-distance-invalid', 400,
+                                                    'Is invalid',
+                                                    field_name='max_distance')
+AreaQueryBoundingBoxInvalid = make_validation_error('AreaQueryBoundingBoxInvalid',
+                                                    'area-query-bbox-invalid', 400,
+                                                    'Must be min_lon,min_lat,max_lon,max_lat',
+                                                    field_name='bbox')
+AreaQueryCursorUnsupported = make_validation_error('AreaQueryCursorUnsupported',
+                                                   'area-query-cursor-unsupported', 400,
+                                                   'Results are ordered by distance, page them with page and limit',
+                                                   field_name='cursor')
+
+GeocodeUnavailable = make_api_error('GeocodeUnavailable',
+                                    'geocode-unavailable', 503,
+                                    'Geocode service unavailable, try again later')
 GeocodeForwardFailed = make_api_error('GeocodeForwardFailed',
                                       'geocode-forward-failed', 400,
                                       'Geocode forward failed')
@@ -197,6 +271,16 @@ GeocodeAddressInvalid = make_validation_error('GeocodeAddressInvalid',
                                               'Is invalid',
                                               field_name='address')
 
+GeocodeBatchInvalid = make_validation_error('GeocodeBatchInvalid',
+                                            'geocode-batch-invalid', 400,
+                                            'Is invalid',
+                                            field_name='items')
+GeocodeLookupTypeInvalid = make_validation_error('GeocodeLookupTypeInvalid',
+                                                 'geocode-lookup-type-invalid', 400,
+                                                 'Must be one of',
+                                                 field_name='type',
+                                                 valid_values=['forward', 'reverse'])
+
 GeocodeReverseFailed = make_api_error('GeocodeReverseFailed',
                                       'geocode-reverse-failed', 400,
                                       'Geocode reverse failed')
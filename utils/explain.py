@@ -0,0 +1,34 @@
+def get_winning_plan(explain: dict) -> dict:
+    #
+    # Aggregations report the plan of their initial query in the $cursor
+    # stage, and the slot based engine wraps the classic plan in queryPlan
+    #
+    if 'queryPlanner' in explain:
+        query_planner = explain['queryPlanner']
+    else:
+        query_planner = explain['stages'][0]['$cursor']['queryPlanner']
+
+    winning_plan = query_planner['winningPlan']
+    return winning_plan.get('queryPlan', winning_plan)
+
+
+def get_winning_stages(plan: dict):
+    stages = [plan['stage']]
+
+    if 'inputStage' in plan:
+        stages.extend(get_winning_stages(plan['inputStage']))
+
+    for input_stage in plan.get('inputStages', []):
+        stages.extend(get_winning_stages(input_stage))
+
+    return stages
+
+
+def get_query_shape(value):
+    if isinstance(value, dict):
+        return {key: get_query_shape(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [get_query_shape(item) for item in value]
+
+    return '?'
@@ -0,0 +1,5 @@
+#
+# Radius MongoDB uses for spherical queries, distances computed outside of the
+# database agree with $near and $centerSphere when they use the same one
+#
+EARTH_RADIUS = 6378100
@@ -0,0 +1,33 @@
+def escape_pointer_token(token: str) -> str:
+    return token.replace('~', '~0').replace('/', '~1')
+
+
+def make_patch(old: dict, new: dict, path: str = '') -> list:
+    operations = []
+
+    for key in old:
+        if key not in new:
+            operations.append({
+                'op': 'remove',
+                'path': '{}/{}'.format(path, escape_pointer_token(str(key))),
+            })
+
+    for key, value in new.items():
+        key_path = '{}/{}'.format(path, escape_pointer_token(str(key)))
+
+        if key not in old:
+            operations.append({
+                'op': 'add',
+                'path': key_path,
+                'value': value,
+            })
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            operations.extend(make_patch(old[key], value, key_path))
+        elif value != old[key]:
+            operations.append({
+                'op': 'replace',
+                'path': key_path,
+                'value': value,
+            })
+
+    return operations
@@ -10,13 +10,25 @@ class TokenType(Enum):
     REFRESH = 'refresh'
 
 
+def get_current_timestamp() -> int:
+    return timegm(datetime.utcnow().utctimetuple())
+
+
+def get_token_ttl(decoded_token: dict):
+    expires_at = decoded_token.get('exp')
+    if expires_at is None:
+        return None
+
+    return expires_at - get_current_timestamp()
+
+
 def verify_fresh_token(decoded_token: dict):
     fresh = decoded_token['fresh']
     if isinstance(fresh, bool):
         if not fresh:
             raise JWTAccessTokenNotFresh('Fresh field is false')
     elif isinstance(fresh, int):
-        now = timegm(datetime.utcnow().utctimetuple())
+        now = get_current_timestamp()
         if fresh < now:
             raise JWTAccessTokenNotFresh('Fresh field is older than current time')
     else: